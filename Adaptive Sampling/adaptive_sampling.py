@@ -0,0 +1,174 @@
+import datetime
+import spiceypy
+import numpy as np
+import pandas as pd
+
+# Loading the SPICE kernels
+spiceypy.furnsh("../Kernels/pck/pck00010.tpc.txt")
+spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+
+# All our time series use a fixed grid (np.linspace with 1 day steps,
+# np.arange with 1 hour steps), no matter how fast a quantity changes. Slow
+# curves (e.g. the outer planets) are heavily oversampled, fast curves (e.g.
+# the Moon) are undersampled.
+#
+# Here, each quantity gets its own grid: an interval is split into two halves
+# until the values at the midpoint and the quarter points of the interval can
+# be approximated by a straight line between the interval borders (within a
+# tolerance). The curve
+# can then be plotted (or linearly interpolated) with the same fidelity, but
+# with far fewer ephemeris evaluations.
+
+
+# Error metrics: deviation between the true value inside an interval and the
+# linear interpolation of the interval borders.
+#
+# "value": absolute deviation (Euclidean norm for vectors); the tolerance is
+#          given in the unit of the quantity, e.g. degrees or km
+# "direction": angle between the true and the interpolated directional
+#              vector; the tolerance is given in radians
+def interpolation_error(true_value, interp_value, metric="value"):
+    if metric == "value":
+        return np.linalg.norm(np.atleast_1d(true_value - interp_value))
+    if metric == "direction":
+        return spiceypy.vsep(true_value, interp_value)
+
+    raise ValueError(f"Unknown error metric: {metric}")
+
+
+# Sample the function func(et) adaptively between et_start and et_end. The
+# interval is first split into initial_samples - 1 equal intervals. Each
+# interval is bisected as long as the interpolation error at one of its three
+# interior points (midpoint and quarter points) exceeds the tolerance and the
+# interval is longer than min_step (in seconds).
+#
+# A single interior point is not sufficient: at an inflection point (e.g. of
+# the Moon's phase angle) the midpoint lies on the straight line, although the
+# curve deviates from it elsewhere in the interval. The quarter points are the
+# midpoints of the two halves; they are re-used if the interval is split.
+#
+# For pixel based tolerances set scale to the number of pixels per unit of
+# the quantity (e.g. figure height in pixels / plotted value range) and give
+# the tolerance in pixels.
+#
+# Returns the (non-uniform) ET grid and the corresponding function values
+def adaptive_sample(
+    func,
+    et_start,
+    et_end,
+    tolerance,
+    metric="value",
+    scale=1.0,
+    initial_samples=16,
+    min_step=60.0,
+):
+    init_grid = np.linspace(et_start, et_end, initial_samples)
+    samples = {et: np.asarray(func(et)) for et in init_grid}
+
+    # Stack of intervals that need to be checked; the midpoint of each
+    # interval on the stack is already sampled
+    intervals = list(zip(init_grid[:-1], init_grid[1:]))
+    for et_left, et_right in intervals:
+        et_mid = (et_left + et_right) / 2.0
+        samples[et_mid] = np.asarray(func(et_mid))
+
+    while intervals:
+        et_left, et_right = intervals.pop()
+        if et_right - et_left <= min_step:
+            continue
+
+        et_mid = (et_left + et_right) / 2.0
+        et_quarters = [(et_left + et_mid) / 2.0, (et_mid + et_right) / 2.0]
+        for et_quarter in et_quarters:
+            samples[et_quarter] = np.asarray(func(et_quarter))
+
+        # Compare the interior points with the straight line between the
+        # interval borders
+        max_error = 0.0
+        for et_check in [et_quarters[0], et_mid, et_quarters[1]]:
+            weight = (et_check - et_left) / (et_right - et_left)
+            interp_value = (1.0 - weight) * samples[et_left]
+            interp_value = interp_value + weight * samples[et_right]
+            error = scale * interpolation_error(samples[et_check], interp_value, metric)
+            max_error = max(max_error, error)
+
+        if max_error > tolerance:
+            intervals.append((et_left, et_mid))
+            intervals.append((et_mid, et_right))
+
+    et_grid = np.array(sorted(samples))
+    return et_grid, np.array([samples[et] for et in et_grid])
+
+
+# Sample several quantities, each one on its own grid. series_dict contains
+# the series name as key and a dictionary with the function and the
+# keyword arguments of adaptive_sample as value. Returns a dictionary with one
+# dataframe (ET, VALUE) per series
+def adaptive_sample_series(series_dict, et_start, et_end):
+    series_results = {}
+    for series_name, series_cfg in series_dict.items():
+        series_kwargs = {
+            key: value for key, value in series_cfg.items() if key != "func"
+        }
+        et_grid, values = adaptive_sample(
+            series_cfg["func"], et_start, et_end, **series_kwargs
+        )
+
+        series_df = pd.DataFrame()
+        series_df.loc[:, "ET"] = et_grid
+        series_df.loc[:, "VALUE"] = list(values) if values.ndim > 1 else values
+        series_results[series_name] = series_df
+
+    return series_results
+
+
+# We use the 10000 days of "Gravitational Pull" as an example
+init_time_utc = datetime.datetime(year=2000, month=1, day=1, hour=0, minute=0, second=0)
+delta_days = 10000
+end_time_utc = init_time_utc + datetime.timedelta(days=delta_days)
+
+# Convert to Ephemeris Time (ET) using the SPICE function utc2et
+init_time_et = spiceypy.utc2et(init_time_utc.strftime("%Y-%m-%dT%H:%M:%S"))
+end_time_et = spiceypy.utc2et(end_time_utc.strftime("%Y-%m-%dT%H:%M:%S"))
+
+# The radius of the Sun is used to scale the SSB distance
+_, radii_sun = spiceypy.bodvcd(bodyid=10, item="RADII", maxn=3)
+radius_sun = radii_sun[0]
+
+SERIES_DICT = {
+    # Distance of the SSB w.r.t. the Sun in Sun radii; 0.001 Sun radii
+    "SSB_WRT_SUN_SCALED_DIST": {
+        "func": lambda et: spiceypy.vnorm(
+            spiceypy.spkgps(targ=0, et=et, ref="ECLIPJ2000", obs=10)[0]
+        )
+        / radius_sun,
+        "tolerance": 0.001,
+    },
+    # Direction of Neptune w.r.t. the Sun; 0.01 degrees
+    "DIR_NEP_WRT_SUN": {
+        "func": lambda et: spiceypy.spkgps(targ=8, et=et, ref="ECLIPJ2000", obs=10)[0],
+        "tolerance": np.radians(0.01),
+        "metric": "direction",
+    },
+    # Moon - Sun angle as seen from the Earth; 1 pixel on a figure that shows
+    # 0 to 180 degrees on 800 pixels
+    "EARTH_MOON2SUN_ANGLE": {
+        "func": lambda et: np.degrees(
+            spiceypy.phaseq(
+                et=et, target="399", illmn="10", obsrvr="301", abcorr="LT+S"
+            )
+        ),
+        "tolerance": 1.0,
+        "scale": 800.0 / 180.0,
+    },
+}
+
+series_results = adaptive_sample_series(SERIES_DICT, init_time_et, end_time_et)
+
+# Compare the number of evaluations with the fixed 1 day grid
+for series_name, series_df in series_results.items():
+    print(
+        f"{series_name}: {len(series_df)} samples "
+        + f"(fixed grid: {delta_days} samples)"
+    )
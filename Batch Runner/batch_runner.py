@@ -0,0 +1,613 @@
+import contextlib
+import datetime
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import spiceypy
+import numpy as np
+import pandas as pd
+import matplotlib
+
+# The figures are rendered without a display (nightly job)
+matplotlib.use("Agg")
+import matplotlib.dates as matpl_dates
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+
+# The nightly job runs all seven scripts as separate processes. Each one loads
+# the kernels, converts the times and computes (partly the same) states of the
+# Sun, the Earth and the planets again. Here, all analyses are described as
+# stages of one dependency graph: each stage declares the stages it needs as
+# inputs. Shared stages (kernels, time grids, body states) run only once;
+# stages that do not depend on each other run concurrently.
+#
+# Note: CSPICE is not thread-safe. Stages that call SPICE are marked and hold
+# a common lock while running; the numpy / pandas computations and the
+# figures of the other stages run in parallel. The figures use the
+# matplotlib.figure.Figure object directly (and not pyplot, which is not
+# thread-safe). The dark style of the scripts is applied via the (global)
+# matplotlib style; the figures are therefore created one after another.
+
+# Registry of all stages: name -> function, input stage names, SPICE flag
+STAGES = {}
+
+# Lock for all SPICE calls
+SPICE_LOCK = threading.Lock()
+
+# Lock for the creation of the figures (the style context changes the global
+# matplotlib settings)
+FIGURE_LOCK = threading.Lock()
+
+# Directory for the figures; the committed figures of the single scripts are
+# not overwritten
+OUTPUT_DIR = "batch_output"
+
+SOLSYS_DICT = {
+    "SUN": 10,
+    "MERCURY": 1,
+    "VENUS": 299,
+    "EARTH": 3,
+    "MOON": 301,
+    "MARS": 4,
+    "JUPITER": 5,
+    "SATURN": 6,
+    "URANUS": 7,
+    "NEPTUNE": 8,
+    "PLUTO": 9,
+}
+
+BODY_COLOR_ARRAY = [
+    "y",
+    "tab:brown",
+    "tab:orange",
+    "g",
+    "tab:gray",
+    "tab:red",
+    "m",
+    "tab:olive",
+    "c",
+    "b",
+    "tab:purple",
+]
+
+PLANET_NAMES = [
+    "Mercury",
+    "Venus",
+    "Earth",
+    "Mars",
+    "Jupiter",
+    "Saturn",
+    "Uranus",
+    "Neptune",
+    "Pluto",
+]
+
+NAIF_ID_DICT = {
+    "MER": 1,
+    "VEN": 2,
+    "EAR": 3,
+    "MAR": 4,
+    "JUP": 5,
+    "SAT": 6,
+    "URA": 7,
+    "NEP": 8,
+    "PLU": 9,
+}
+
+
+# Register a function as a stage. The function is called with the outputs of
+# the input stages as keyword arguments (same names as the stages)
+def stage(name, inputs=(), spice=False):
+    def register(func):
+        STAGES[name] = {"func": func, "inputs": tuple(inputs), "spice": spice}
+        return func
+
+    return register
+
+
+# Return all stages that are needed for the targets (including the targets)
+def required_stages(stages, targets):
+    required = set()
+    to_visit = list(targets)
+    while to_visit:
+        stage_name = to_visit.pop()
+        if stage_name not in stages:
+            raise ValueError(f"Unknown stage: {stage_name}")
+        if stage_name not in required:
+            required.add(stage_name)
+            to_visit.extend(stages[stage_name]["inputs"])
+
+    return required
+
+
+# Run the stages (default: all) of the graph. A stage is started as soon as
+# all of its inputs are available. Returns the outputs and a dataframe with
+# the timings of each stage
+def run_stages(stages=None, targets=None, max_workers=None):
+    stages = STAGES if stages is None else stages
+    targets = list(stages) if targets is None else targets
+    pending = required_stages(stages, targets)
+
+    outputs = {}
+    timings = []
+
+    def run_stage(stage_name):
+        stage_cfg = stages[stage_name]
+        stage_inputs = {name: outputs[name] for name in stage_cfg["inputs"]}
+
+        # SPICE stages wait for the lock; the waiting time is not part of the
+        # stage timing
+        with SPICE_LOCK if stage_cfg["spice"] else contextlib.nullcontext():
+            start_time = time.perf_counter()
+            stage_output = stage_cfg["func"](**stage_inputs)
+            duration = time.perf_counter() - start_time
+
+        timings.append(
+            {
+                "STAGE": stage_name,
+                "START_S": start_time - run_start,
+                "DURATION_S": duration,
+            }
+        )
+        return stage_output
+
+    run_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            ready = [
+                stage_name
+                for stage_name in pending
+                if all(name in outputs for name in stages[stage_name]["inputs"])
+            ]
+            if not ready and not running:
+                raise ValueError(f"Cyclic dependencies between the stages: {pending}")
+
+            for stage_name in sorted(ready):
+                pending.remove(stage_name)
+                running[executor.submit(run_stage, stage_name)] = stage_name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                outputs[running.pop(future)] = future.result()
+
+    timings_df = pd.DataFrame(timings).sort_values("START_S").reset_index(drop=True)
+    return outputs, timings_df
+
+
+# Create the figures within this context: same dark style as the scripts
+@contextlib.contextmanager
+def dark_figure_context():
+    with FIGURE_LOCK, matplotlib.style.context("dark_background"):
+        yield
+
+
+# Save a figure in the output directory
+def save_figure(fig, file_name):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    fig.savefig(os.path.join(OUTPUT_DIR, file_name), dpi=300)
+
+
+# Convert longitudes in [0, 2 pi) into matplotlib compatible (inverted)
+# values in [-pi, pi]
+def long4plot(long_rad):
+    return np.where(long_rad > np.pi, -1 * ((long_rad % np.pi) - np.pi), -1 * long_rad)
+
+
+# Angle between two arrays of vectors (shape (N, 3)); same as vsep
+def vsep_array(vec_a, vec_b):
+    dir_a = vec_a / np.linalg.norm(vec_a, axis=1, keepdims=True)
+    dir_b = vec_b / np.linalg.norm(vec_b, axis=1, keepdims=True)
+    chord = np.linalg.norm(dir_a - dir_b, axis=1)
+    return 2.0 * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+# Longitude in [0, 2 pi) and latitude of an array of vectors (shape (N, 3));
+# same as recrad
+def recrad_array(vectors):
+    long_rad = np.mod(np.arctan2(vectors[:, 1], vectors[:, 0]), 2.0 * np.pi)
+    lat_rad = np.arcsin(vectors[:, 2] / np.linalg.norm(vectors, axis=1))
+    return long_rad, lat_rad
+
+
+# Shared stages: kernels, times and states
+@stage("kernels", spice=True)
+def load_kernels():
+    spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+    spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+    spiceypy.furnsh("../Kernels/pck/pck00010.tpc.txt")
+    spiceypy.furnsh("../Kernels/pck/gm_de431.tpc.txt")
+
+
+@stage("time_today_midnight", inputs=["kernels"], spice=True)
+def time_today_midnight(kernels):
+    date_today = datetime.datetime.today().strftime("%Y-%m-%dT00:00:00")
+    return {"UTC": date_today, "ET": spiceypy.utc2et(date_today)}
+
+
+@stage("time_now", inputs=["kernels"], spice=True)
+def time_now(kernels):
+    datetime_utc = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    return {"UTC": datetime_utc, "ET": spiceypy.utc2et(datetime_utc)}
+
+
+# 10000 days from 2000-01-01 ("Solar System Barycenter" and "Gravitational
+# Pull")
+@stage("time_grid_daily", inputs=["kernels"], spice=True)
+def time_grid_daily(kernels):
+    init_time_utc = datetime.datetime(year=2000, month=1, day=1)
+    delta_days = 10000
+    end_time_utc = init_time_utc + datetime.timedelta(days=delta_days)
+
+    init_time_et = spiceypy.utc2et(init_time_utc.strftime("%Y-%m-%dT%H:%M:%S"))
+    end_time_et = spiceypy.utc2et(end_time_utc.strftime("%Y-%m-%dT%H:%M:%S"))
+    time_interval_et = np.linspace(init_time_et, end_time_et, delta_days)
+
+    return {
+        "ET": time_interval_et,
+        "UTC": [utc.date() for utc in spiceypy.et2datetime(time_interval_et)],
+    }
+
+
+# Hourly steps between 2023-01-01 and 2024-10-01 ("Planets in the Sky")
+@stage("time_grid_hourly", inputs=["kernels"], spice=True)
+def time_grid_hourly(kernels):
+    init_time_et = spiceypy.utc2et(
+        datetime.datetime(year=2023, month=1, day=1).strftime("%Y-%m-%dT%H:%M:%S")
+    )
+    end_time_et = spiceypy.utc2et(
+        datetime.datetime(year=2024, month=10, day=1).strftime("%Y-%m-%dT%H:%M:%S")
+    )
+    time_interval_et = np.arange(init_time_et, end_time_et, 3600.0)
+
+    return {"ET": time_interval_et, "UTC": spiceypy.et2datetime(time_interval_et)}
+
+
+@stage("radius_sun", inputs=["kernels"], spice=True)
+def radius_sun(kernels):
+    _, radii_sun = spiceypy.bodvcd(bodyid=10, item="RADII", maxn=3)
+    return radii_sun[0]
+
+
+@stage("gm_sun", inputs=["kernels"], spice=True)
+def gm_sun(kernels):
+    _, gm_value = spiceypy.bodvcd(bodyid=10, item="GM", maxn=1)
+    return gm_value[0]
+
+
+# J2000 and ECLIPJ2000 are inertial; the matrix is the same for all ETs
+@stage("equ2ecl_matrix", inputs=["kernels", "time_now"], spice=True)
+def equ2ecl_matrix(kernels, time_now):
+    return spiceypy.pxform(fromstr="J2000", tostr="ECLIPJ2000", et=time_now["ET"])
+
+
+# State of the Earth w.r.t. the Sun ("The Earth" and "Velocity of the Earth")
+@stage("earth_state_today", inputs=["time_today_midnight"], spice=True)
+def earth_state_today(time_today_midnight):
+    earth_state_wrt_sun, _ = spiceypy.spkgeo(
+        targ=399, et=time_today_midnight["ET"], ref="ECLIPJ2000", obs=10
+    )
+    return np.array(earth_state_wrt_sun)
+
+
+# Position of the SSB w.r.t. the Sun ("Solar System Barycenter" and
+# "Gravitational Pull")
+@stage("ssb_wrt_sun", inputs=["time_grid_daily"], spice=True)
+def ssb_wrt_sun(time_grid_daily):
+    ssb_pos, _ = spiceypy.spkpos("0", time_grid_daily["ET"], "ECLIPJ2000", "NONE", "10")
+    return ssb_pos
+
+
+@stage("planets_wrt_sun", inputs=["time_grid_daily"], spice=True)
+def planets_wrt_sun(time_grid_daily):
+    planets_pos = {}
+    for planet_abr, planet_id in NAIF_ID_DICT.items():
+        planets_pos[planet_abr], _ = spiceypy.spkpos(
+            str(planet_id), time_grid_daily["ET"], "ECLIPJ2000", "NONE", "10"
+        )
+    return planets_pos
+
+
+# Directional vectors Earth - body (J2000, LT+S) for now; the ecliptic
+# coordinates are derived with the rotation matrix ("Ecliptic Coordinates"
+# and "Equatorial Coordinates")
+@stage("sky_vectors_now", inputs=["time_now"], spice=True)
+def sky_vectors_now(time_now):
+    return np.array(
+        [
+            spiceypy.spkezp(
+                targ=naif_id, et=time_now["ET"], ref="J2000", abcorr="LT+S", obs=399
+            )[0]
+            for naif_id in SOLSYS_DICT.values()
+        ]
+    )
+
+
+# Directional vectors Earth - Sun, Venus, Moon (J2000, LT+S) for the hourly
+# grid ("Planets in the Sky")
+@stage("inner_solsys_vectors", inputs=["time_grid_hourly"], spice=True)
+def inner_solsys_vectors(time_grid_hourly):
+    vectors = {}
+    for body_name, naif_id in [("SUN", 10), ("VEN", 299), ("MOON", 301)]:
+        vectors[body_name], _ = spiceypy.spkpos(
+            str(naif_id), time_grid_hourly["ET"], "J2000", "LT+S", "399"
+        )
+    return vectors
+
+
+# The analyses
+@stage("comp_earth", inputs=["earth_state_today", "time_today_midnight"], spice=True)
+def comp_earth(earth_state_today, time_today_midnight):
+    earth_sun_distance = np.linalg.norm(earth_state_today[:3])
+    earth_sun_distance_au = spiceypy.convrt(earth_sun_distance, "km", "au")
+    print(
+        f"Distance Earth - Sun for {time_today_midnight['UTC']} in AU: "
+        + f"{earth_sun_distance_au}"
+    )
+    return earth_sun_distance_au
+
+
+@stage("earth_vel_comp", inputs=["earth_state_today", "gm_sun"])
+def earth_vel_comp(earth_state_today, gm_sun):
+    earth_sun_distance = np.linalg.norm(earth_state_today[:3])
+    earth_orb_speed_wrt_sun = np.linalg.norm(earth_state_today[3:])
+    earth_orb_speed_wrt_sun_theory = np.sqrt(gm_sun / earth_sun_distance)
+
+    # Angular distance between the autumn vector (1, 0, 0) and the Earth
+    ang_dist_deg = np.degrees(np.arccos(earth_state_today[0] / earth_sun_distance))
+
+    print(
+        f"Orbital speed of the Earth in km/s: {earth_orb_speed_wrt_sun} "
+        + f"(theory: {earth_orb_speed_wrt_sun_theory})"
+    )
+    return {
+        "SPEED": earth_orb_speed_wrt_sun,
+        "SPEED_THEORY": earth_orb_speed_wrt_sun_theory,
+        "ANG_DIST_AUTUMN_DEG": ang_dist_deg,
+    }
+
+
+@stage("ssb", inputs=["ssb_wrt_sun", "radius_sun"])
+def ssb(ssb_wrt_sun, radius_sun):
+    ssb_wrt_sun_scaled = ssb_wrt_sun / radius_sun
+
+    with dark_figure_context():
+        fig = Figure(figsize=(12, 12))
+        ax = fig.subplots()
+        ax.add_artist(Circle((0.0, 0.0), 1.0, color="yellow", alpha=0.6))
+        ax.plot(
+            ssb_wrt_sun_scaled[:, 0],
+            ssb_wrt_sun_scaled[:, 1],
+            ls="solid",
+            color="royalblue",
+        )
+        ax.set_aspect("equal")
+        ax.grid(True, linestyle="dashed", alpha=0.5)
+        ax.set_xlim(-2, 2)
+        ax.set_ylim(-2, 2)
+        ax.set_xlabel("x in sun-radii")
+        ax.set_ylabel("y in sun-radii")
+        save_figure(fig, "ssb_wrt_sun.png")
+
+    # Fraction of time where the SSB was outside the Sun
+    ssb_outside_sun = np.mean(np.linalg.norm(ssb_wrt_sun_scaled, axis=1) > 1)
+    print(
+        f"Fraction of time where the SSB was outside the Sun: {100 * ssb_outside_sun} %"
+    )
+    return ssb_outside_sun
+
+
+@stage(
+    "ssb_grav_pull",
+    inputs=["ssb_wrt_sun", "planets_wrt_sun", "radius_sun", "time_grid_daily"],
+)
+def ssb_grav_pull(ssb_wrt_sun, planets_wrt_sun, radius_sun, time_grid_daily):
+    solar_system_df = pd.DataFrame()
+    solar_system_df.loc[:, "ET"] = time_grid_daily["ET"]
+    solar_system_df.loc[:, "UTC"] = time_grid_daily["UTC"]
+    solar_system_df.loc[:, "SSB_WRT_SUN_SCALED_DIST"] = (
+        np.linalg.norm(ssb_wrt_sun, axis=1) / radius_sun
+    )
+    for planet_abr, planet_pos in planets_wrt_sun.items():
+        solar_system_df.loc[:, f"PHASE_ANGLE_SUN_{planet_abr}2SSB"] = np.degrees(
+            vsep_array(planet_pos, ssb_wrt_sun)
+        )
+
+    with dark_figure_context():
+        fig = Figure(figsize=(8, 45))
+        axes = fig.subplots(len(NAIF_ID_DICT), 1, sharex=True)
+        for ax_f, planet_abr, planet_name in zip(axes, NAIF_ID_DICT, PLANET_NAMES):
+            ax_f.set_title(planet_name, color="tab:orange")
+            ax_f.plot(
+                solar_system_df["UTC"],
+                solar_system_df["SSB_WRT_SUN_SCALED_DIST"],
+                color="tab:cyan",
+            )
+            ax_f.set_ylabel("SSB Dist. in Sun Radii", color="tab:cyan")
+            ax_f.tick_params(axis="y", labelcolor="tab:cyan")
+            ax_f.set_xlim(min(solar_system_df["UTC"]), max(solar_system_df["UTC"]))
+            ax_f.set_ylim(0, 2)
+
+            ax_f_add = ax_f.twinx()
+            ax_f_add.plot(
+                solar_system_df["UTC"],
+                solar_system_df[f"PHASE_ANGLE_SUN_{planet_abr}2SSB"],
+                color="tab:orange",
+            )
+            ax_f_add.set_ylabel("Planet phase angle in deg.", color="tab:orange")
+            ax_f_add.tick_params(axis="y", labelcolor="tab:orange")
+            ax_f_add.invert_yaxis()
+            ax_f_add.set_ylim(180, 0)
+            ax_f.grid(axis="x", linestyle="dashed", alpha=0.5)
+
+        axes[1].set_xlabel("Date / Year")
+        fig.tight_layout()
+        fig.subplots_adjust(hspace=0.2)
+        save_figure(fig, "grav_pull_plots.png")
+
+    return solar_system_df
+
+
+# The phase angles of phaseq (target Earth) are computed as separations of
+# the directional vectors as seen from the Earth; the light time correction
+# differs from phaseq in the order of arcseconds
+@stage("planets_in_sky", inputs=["inner_solsys_vectors", "time_grid_hourly"])
+def planets_in_sky(inner_solsys_vectors, time_grid_hourly):
+    inner_solsys_df = pd.DataFrame()
+    inner_solsys_df.loc[:, "ET"] = time_grid_hourly["ET"]
+    inner_solsys_df.loc[:, "UTC"] = time_grid_hourly["UTC"]
+    inner_solsys_df.loc[:, "EARTH_VEN2SUN_ANGLE"] = np.degrees(
+        vsep_array(inner_solsys_vectors["VEN"], inner_solsys_vectors["SUN"])
+    )
+    inner_solsys_df.loc[:, "EARTH_MOON2SUN_ANGLE"] = np.degrees(
+        vsep_array(inner_solsys_vectors["MOON"], inner_solsys_vectors["SUN"])
+    )
+    inner_solsys_df.loc[:, "EARTH_MOON2VEN_ANGLE"] = np.degrees(
+        vsep_array(inner_solsys_vectors["MOON"], inner_solsys_vectors["VEN"])
+    )
+    inner_solsys_df.loc[:, "PHOTOGENIC"] = (
+        (inner_solsys_df["EARTH_VEN2SUN_ANGLE"] > 30.0)
+        & (inner_solsys_df["EARTH_MOON2SUN_ANGLE"] > 30.0)
+        & (inner_solsys_df["EARTH_MOON2VEN_ANGLE"] < 10.0)
+    ).astype(int)
+
+    print(f"Number of photogenic hours: {inner_solsys_df['PHOTOGENIC'].sum()}")
+
+    with dark_figure_context():
+        fig = Figure(figsize=(12, 8))
+        ax = fig.subplots()
+        for angle_col, color, label in [
+            ("EARTH_VEN2SUN_ANGLE", "tab:orange", "Venus - Sun"),
+            ("EARTH_MOON2SUN_ANGLE", "tab:cyan", "Moon - Sun"),
+            ("EARTH_MOON2VEN_ANGLE", "tab:red", "Moon - Venus"),
+        ]:
+            ax.plot(
+                inner_solsys_df["UTC"],
+                inner_solsys_df[angle_col],
+                color=color,
+                label=label,
+            )
+        ax.set_xlabel("Date in UTC")
+        ax.set_ylabel("Angle in degrees")
+        ax.set_xlim(min(inner_solsys_df["UTC"]), max(inner_solsys_df["UTC"]))
+        ax.grid(axis="x", linestyle="dashed", alpha=0.5)
+
+        # Month and day locator; date-time format: Year + Month name
+        ax.xaxis.set_major_locator(matpl_dates.MonthLocator())
+        ax.xaxis.set_minor_locator(matpl_dates.DayLocator())
+        ax.xaxis.set_major_formatter(matpl_dates.DateFormatter("%Y-%b"))
+
+        photogenic_df = inner_solsys_df.loc[inner_solsys_df["PHOTOGENIC"] == 1]
+        for photogenic_utc in photogenic_df["UTC"]:
+            ax.axvline(photogenic_utc, color="tab:blue", alpha=0.2)
+
+        ax.legend(fancybox=True, loc="upper right", framealpha=1)
+        ax.tick_params(axis="x", labelrotation=45)
+        save_figure(fig, "venus_sun_moon.png")
+
+    return inner_solsys_df
+
+
+# Sky map in the projection "aitoff" (shared by the ecliptic and equatorial
+# maps). x_tick_labels replace the standard longitude ticks at -150 ... 150
+# degrees
+def sky_map(
+    long_rad,
+    lat_rad,
+    title,
+    file_name,
+    x_tick_labels,
+    x_label,
+    y_label,
+    extra_points=None,
+):
+    with dark_figure_context():
+        fig = Figure(figsize=(12, 8))
+        ax = fig.add_subplot(projection="aitoff")
+        ax.set_title(title, fontsize=10)
+        for body_idx, (body_name, body_color) in enumerate(
+            zip(SOLSYS_DICT, BODY_COLOR_ARRAY)
+        ):
+            ax.plot(
+                long4plot(long_rad[body_idx]),
+                lat_rad[body_idx],
+                color=body_color,
+                marker="o",
+                linestyle="None",
+                markersize=12,
+                label=body_name.capitalize(),
+            )
+        if extra_points is not None:
+            ax.plot(
+                *extra_points,
+                color="tab:blue",
+                linestyle="None",
+                marker="o",
+                markersize=2,
+            )
+        ax.set_xticks(np.radians(np.arange(-150, 180, 30)), labels=x_tick_labels)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.legend(ncol=6)
+        ax.grid(True)
+        save_figure(fig, file_name)
+
+
+@stage("ecliptic_coordinates", inputs=["sky_vectors_now", "equ2ecl_matrix", "time_now"])
+def ecliptic_coordinates(sky_vectors_now, equ2ecl_matrix, time_now):
+    long_rad, lat_rad = recrad_array(sky_vectors_now @ equ2ecl_matrix.T)
+    sky_map(
+        long_rad,
+        lat_rad,
+        f"{time_now['UTC']} UTC",
+        "eclipj2000_sky_map.png",
+        x_tick_labels=[f"{deg}°" for deg in (150, 120, 90, 60, 30, 0)]
+        + [f"{deg}°" for deg in (330, 300, 270, 240, 210)],
+        x_label="Eclip. long. in deg",
+        y_label="Eclip. lat. in deg",
+    )
+    return pd.DataFrame(
+        {"LONG_RAD_ECL": long_rad, "LAT_RAD_ECL": lat_rad}, index=list(SOLSYS_DICT)
+    )
+
+
+@stage(
+    "equatorial_coordinates", inputs=["sky_vectors_now", "equ2ecl_matrix", "time_now"]
+)
+def equatorial_coordinates(sky_vectors_now, equ2ecl_matrix, time_now):
+    long_rad, lat_rad = recrad_array(sky_vectors_now)
+
+    # The ecliptic plane in J2000 (latitude 0 in ECLIPJ2000); the inverse of
+    # a rotation matrix is its transpose
+    eclip_long = np.linspace(0, 2 * np.pi, 100)
+    eclip_plane_ecl = np.column_stack(
+        (np.cos(eclip_long), np.sin(eclip_long), np.zeros_like(eclip_long))
+    )
+    eclip_long_equ, eclip_lat_equ = recrad_array(eclip_plane_ecl @ equ2ecl_matrix)
+
+    sky_map(
+        long_rad,
+        lat_rad,
+        f"{time_now['UTC']} UTC",
+        "j2000_sky_map.png",
+        x_tick_labels=[f"{hour} h" for hour in (10, 8, 6, 4, 2, 0, 22, 20, 18, 16, 14)],
+        x_label="Right ascension in hours",
+        y_label="Declination in deg.",
+        extra_points=(long4plot(eclip_long_equ), eclip_lat_equ),
+    )
+    return pd.DataFrame(
+        {"LONG_RAD_EQU": long_rad, "LAT_RAD_EQU": lat_rad}, index=list(SOLSYS_DICT)
+    )
+
+
+# Run the whole suite and print the timings of the stages
+suite_outputs, suite_timings_df = run_stages()
+
+print(suite_timings_df)
+suite_wall_time = (suite_timings_df["START_S"] + suite_timings_df["DURATION_S"]).max()
+print(
+    f"Wall time: {suite_wall_time:.2f} s "
+    + f"(sum of all stages: {suite_timings_df['DURATION_S'].sum():.2f} s)"
+)
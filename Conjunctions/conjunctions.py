@@ -0,0 +1,258 @@
+import datetime
+import itertools
+import spiceypy
+import numpy as np
+import pandas as pd
+
+# Loading the SPICE kernels
+spiceypy.furnsh("../Kernels/pck/pck00010.tpc.txt")
+spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+
+# In "Planets in the Sky" we hand-picked a single pair (Moon - Venus) and
+# checked its angular distance every hour. Here we want to find ALL close
+# approaches (conjunctions) between a set of bodies as seen from the Earth.
+# Checking every pair at every time step scales with N^2 * T; instead we
+# sort the bodies into cells on the sky for each chunk of time and only check
+# pairs that fall into neighbouring cells.
+
+
+# Compute the normalised directional vectors (as seen from the observer) for
+# all bodies and all ETs. The result has the shape (T, N, 3)
+def body_directions(et_array, naif_ids, ref="J2000", abcorr="LT+S", obs=399):
+    directions = np.empty((len(et_array), len(naif_ids), 3))
+    for body_idx, naif_id in enumerate(naif_ids):
+        for et_idx, et in enumerate(et_array):
+            directions[et_idx, body_idx] = spiceypy.spkezp(
+                targ=naif_id, et=et, ref=ref, abcorr=abcorr, obs=obs
+            )[0]
+
+    return directions / np.linalg.norm(directions, axis=-1, keepdims=True)
+
+
+# Angular separation between unit vectors. 2 * arcsin(|a - b| / 2) is
+# numerically more stable than arccos(a . b) for small angles (and these are
+# the angles we are interested in!)
+def unit_vector_separation(dir_a, dir_b):
+    chord = np.linalg.norm(np.asarray(dir_a) - np.asarray(dir_b), axis=-1)
+    return 2.0 * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+# The spatial index: a unit vector lies on the sphere, and every point on the
+# sphere within the angle theta of a direction lies within the (straight
+# line) chord distance 2 * sin(theta / 2) of it. We cut the space into cubic
+# cells and insert each body into all cells that touch the box around its
+# search cap (chunk bounding cap enlarged by half the threshold). If two
+# bodies may come closer than the threshold, their search caps intersect and
+# both bodies are listed in the cell that contains the intersection
+def chord_length(angle):
+    return 2.0 * np.sin(np.minimum(angle, np.pi) / 2.0)
+
+
+def sky_cells(centre_dir, search_radius, cell_size):
+    half_width = chord_length(search_radius)
+    cell_min = np.floor((centre_dir - half_width) / cell_size).astype(int)
+    cell_max = np.floor((centre_dir + half_width) / cell_size).astype(int)
+    return itertools.product(
+        *(range(lower, upper + 1) for lower, upper in zip(cell_min, cell_max))
+    )
+
+
+# Return the candidate pairs (index a, index b) whose chunk bounding caps
+# (centre direction + angular radius) may come closer than the threshold
+def candidate_pairs(centre_dirs, cap_radii, threshold):
+    search_radii = cap_radii + threshold / 2.0
+
+    # The cell size follows the typical (median) search cap. A few fast
+    # bodies (e.g. the Moon) with large caps are inserted into more cells,
+    # but they do not coarsen the grid for all other bodies
+    cell_size = 2.0 * chord_length(np.median(search_radii))
+
+    # Fill the cell dictionary: each cell lists the bodies whose search cap
+    # touches it
+    sky_grid = {}
+    for body_idx, (centre_dir, search_radius) in enumerate(
+        zip(centre_dirs, search_radii)
+    ):
+        for cell in sky_cells(centre_dir, search_radius, cell_size):
+            sky_grid.setdefault(cell, []).append(body_idx)
+
+    # Only bodies that share a cell are candidates
+    pairs = set()
+    for cell_bodies in sky_grid.values():
+        for idx_a, idx_b in itertools.combinations(cell_bodies, 2):
+            pairs.add((idx_a, idx_b))
+
+    # The cells are a coarse filter. Apply now the exact cap overlap test
+    return [
+        (idx_a, idx_b)
+        for idx_a, idx_b in sorted(pairs)
+        if unit_vector_separation(centre_dirs[idx_a], centre_dirs[idx_b])
+        < threshold + cap_radii[idx_a] + cap_radii[idx_b]
+    ]
+
+
+# Refine the minimum separation between two bodies within the ET interval
+# [et_left, et_right] with a golden-section search. tol is given in seconds
+def refine_minimum(
+    naif_id_a,
+    naif_id_b,
+    et_left,
+    et_right,
+    tol=1.0,
+    ref="J2000",
+    abcorr="LT+S",
+    obs=399,
+):
+    def separation(et):
+        dirs = body_directions([et], [naif_id_a, naif_id_b], ref, abcorr, obs)[0]
+        return unit_vector_separation(dirs[0], dirs[1])
+
+    inv_phi = (np.sqrt(5.0) - 1.0) / 2.0
+    et_c = et_right - inv_phi * (et_right - et_left)
+    et_d = et_left + inv_phi * (et_right - et_left)
+    sep_c, sep_d = separation(et_c), separation(et_d)
+    while et_right - et_left > tol:
+        if sep_c < sep_d:
+            et_right, et_d, sep_d = et_d, et_c, sep_c
+            et_c = et_right - inv_phi * (et_right - et_left)
+            sep_c = separation(et_c)
+        else:
+            et_left, et_c, sep_c = et_c, et_d, sep_d
+            et_d = et_left + inv_phi * (et_right - et_left)
+            sep_d = separation(et_d)
+
+    et_min = (et_left + et_right) / 2.0
+    return et_min, separation(et_min)
+
+
+# The conjunction search. The time grid is split into chunks of chunk_size
+# samples. For each chunk, every body is described by a bounding cap on the
+# sky; only pairs in neighbouring cells with overlapping caps are sampled and
+# their local minima are refined. Returns a dataframe with one row per event
+def find_conjunctions(
+    body_dict,
+    et_array,
+    threshold_deg=10.0,
+    chunk_size=4,
+    ref="J2000",
+    abcorr="LT+S",
+    obs=399,
+):
+    body_names = list(body_dict)
+    naif_ids = [body_dict[body_name] for body_name in body_names]
+    threshold = np.radians(threshold_deg)
+
+    events = []
+    carry_dirs = np.empty((0, len(naif_ids), 3))
+    for chunk_start in range(0, len(et_array), chunk_size):
+        chunk_end = min(chunk_start + chunk_size, len(et_array))
+
+        # Add one sample on each side of the chunk. A minimum located at the
+        # chunk border can only be detected if both neighbours are known
+        pad_start = max(chunk_start - 1, 0)
+        pad_end = min(chunk_end + 1, len(et_array))
+        chunk_et = et_array[pad_start:pad_end]
+
+        # The first two samples (last sample and look-ahead sample of the
+        # previous chunk) are carried forward; every ET is computed only once
+        new_dirs = body_directions(
+            et_array[pad_start + len(carry_dirs) : pad_end], naif_ids, ref, abcorr, obs
+        )
+        chunk_dirs = np.concatenate((carry_dirs, new_dirs))
+        carry_dirs = chunk_dirs[-2:]
+
+        # Bounding cap per body: normalised mean direction and the largest
+        # angular distance of a sample from it
+        centre_dirs = chunk_dirs.sum(axis=0)
+        centre_dirs /= np.linalg.norm(centre_dirs, axis=-1, keepdims=True)
+        cap_radii = unit_vector_separation(chunk_dirs, centre_dirs[np.newaxis]).max(
+            axis=0
+        )
+
+        for idx_a, idx_b in candidate_pairs(centre_dirs, cap_radii, threshold):
+            pair_sep = unit_vector_separation(
+                chunk_dirs[:, idx_a], chunk_dirs[:, idx_b]
+            )
+
+            # Local minima of the sampled separation that belong to this
+            # chunk (and not to the padding)
+            for k in range(1, len(chunk_et) - 1):
+                if not chunk_start <= pad_start + k < chunk_end:
+                    continue
+                if not pair_sep[k - 1] >= pair_sep[k] <= pair_sep[k + 1]:
+                    continue
+
+                et_min, sep_min = refine_minimum(
+                    naif_ids[idx_a],
+                    naif_ids[idx_b],
+                    chunk_et[k - 1],
+                    chunk_et[k + 1],
+                    ref=ref,
+                    abcorr=abcorr,
+                    obs=obs,
+                )
+                if sep_min < threshold:
+                    events.append(
+                        {
+                            "ET": et_min,
+                            "UTC": spiceypy.et2datetime(et=et_min),
+                            "BODY_A": body_names[idx_a],
+                            "BODY_B": body_names[idx_b],
+                            "SEPARATION_DEG": np.degrees(sep_min),
+                        }
+                    )
+
+    return (
+        pd.DataFrame(
+            events, columns=["ET", "UTC", "BODY_A", "BODY_B", "SEPARATION_DEG"]
+        )
+        .sort_values("ET")
+        .reset_index(drop=True)
+    )
+
+
+# Create an initial and ending time date-time object that is converted to a
+# string
+init_time_utc_str = datetime.datetime(year=2023, month=1, day=1).strftime(
+    "%Y-%m-%dT%H:%M:%S"
+)
+end_time_utc_str = datetime.datetime(year=2024, month=10, day=1).strftime(
+    "%Y-%m-%dT%H:%M:%S"
+)
+
+# Convert to Ephemeris Time (ET) using the SPICE function utc2et
+init_time_et = spiceypy.utc2et(init_time_utc_str)
+end_time_et = spiceypy.utc2et(end_time_utc_str)
+
+# A 6 hour grid is sufficient to bracket the minima; the exact times are
+# computed by the refinement step
+delta_six_hours_in_seconds = 6.0 * 3600.0
+time_interval_et = np.arange(init_time_et, end_time_et, delta_six_hours_in_seconds)
+
+# The same bodies as in the sky map scripts. As seen from the Earth, the
+# Earth-Moon barycentre (3) is always in the direction of the Moon; every
+# "Earth - Moon" close approach would be trivial. We drop it here
+SOLSYS_DICT = {
+    "SUN": 10,
+    "MERCURY": 1,
+    "VENUS": 299,
+    "EARTH": 3,
+    "MOON": 301,
+    "MARS": 4,
+    "JUPITER": 5,
+    "SATURN": 6,
+    "URANUS": 7,
+    "NEPTUNE": 8,
+    "PLUTO": 9,
+}
+sky_body_dict = {
+    body_name: naif_id for body_name, naif_id in SOLSYS_DICT.items() if naif_id != 3
+}
+
+# Find all close approaches below 10 degrees (the same angular distance as
+# used for the "photogenic" Moon - Venus constellations)
+conjunctions_df = find_conjunctions(sky_body_dict, time_interval_et, threshold_deg=10.0)
+
+print(f"Number of conjunctions found: {len(conjunctions_df)}")
+print(conjunctions_df)
@@ -0,0 +1,343 @@
+import datetime
+import spiceypy
+import numpy as np
+import pandas as pd
+
+# Loading the SPICE kernels. The PCK provides the tri-axial radii and the
+# body-fixed frames (IAU_EARTH, IAU_MOON, ...) of the bodies
+spiceypy.furnsh("../Kernels/pck/pck00010.tpc.txt")
+spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+
+# We want to find eclipses and occultations over long time spans. Checking the
+# exact (ellipsoid) geometry every minute over decades would require millions
+# of SPICE calls. Instead, we proceed in two steps:
+#
+# 1. Culling: on a coarse time grid we compute (vectorised) the angular
+#    separation of the two bodies and compare it with the sum of their
+#    angular radii. Each body is approximated by a bounding sphere (the
+#    largest of its three radii). Only intervals where both spheres may
+#    overlap survive.
+# 2. Refinement: for each surviving window the exact contact times are
+#    computed by bisection.
+
+
+# Bounding sphere radius (largest tri-axial radius) of a body. Bodies without
+# radii in the kernel pool (e.g. the planet barycentres 1, 4, 5, ...) are
+# treated as points
+def bounding_radius(naif_id):
+    if not spiceypy.bodfnd(naif_id, "RADII"):
+        return 0.0
+
+    _, radii = spiceypy.bodvcd(bodyid=naif_id, item="RADII", maxn=3)
+    return max(radii)
+
+
+# Shape and body-fixed frame of a body as expected by the SPICE function
+# occult
+def occult_shape(naif_id):
+    if not spiceypy.bodfnd(naif_id, "RADII"):
+        return "POINT", " "
+
+    _, frame_name = spiceypy.cidfrm(naif_id)
+    return "ELLIPSOID", frame_name
+
+
+# Disk geometry of two bodies as seen from the observer: the angular
+# separation and the angular radii of the bounding spheres. observer_radius
+# > 0 considers observers anywhere on the surface of the observing body (e.g.
+# solar eclipses visible from any place on Earth): the apparent separation
+# can then change by up to the parallax difference, i.e. the angle of the
+# observer radius as seen from the front body minus the one seen from the
+# back body.
+#
+# et can be a single ET or an array of ETs (vectorised computation). Returns
+# separation, angular radius front, angular radius back, parallax difference
+def disk_geometry(front, back, observer, et, abcorr="LT", observer_radius=0.0):
+    et_array = np.atleast_1d(et)
+    pos_front, _ = spiceypy.spkpos(str(front), et_array, "J2000", abcorr, str(observer))
+    pos_back, _ = spiceypy.spkpos(str(back), et_array, "J2000", abcorr, str(observer))
+    pos_front, pos_back = np.atleast_2d(pos_front), np.atleast_2d(pos_back)
+
+    dist_front = np.linalg.norm(pos_front, axis=1)
+    dist_back = np.linalg.norm(pos_back, axis=1)
+
+    # Angular separation (same as vsep)
+    chord = np.linalg.norm(
+        pos_front / dist_front[:, np.newaxis] - pos_back / dist_back[:, np.newaxis],
+        axis=1,
+    )
+    separation = 2.0 * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+    # Angular radii of the bounding spheres and parallaxes
+    ang_radius_front = np.arcsin(np.clip(bounding_radius(front) / dist_front, 0.0, 1.0))
+    ang_radius_back = np.arcsin(np.clip(bounding_radius(back) / dist_back, 0.0, 1.0))
+    parallax_diff = np.arcsin(np.clip(observer_radius / dist_front, 0.0, 1.0)) - (
+        np.arcsin(np.clip(observer_radius / dist_back, 0.0, 1.0))
+    )
+
+    geometry = (separation, ang_radius_front, ang_radius_back, parallax_diff)
+    if np.ndim(et) > 0:
+        return geometry
+    return tuple(value[0] for value in geometry)
+
+
+# Contact function: the angular separation minus the sum of the angular radii
+# (and the parallax difference). Negative values: the bounding spheres
+# overlap for at least one observer
+def contact_function(front, back, observer, et, abcorr="LT", observer_radius=0.0):
+    separation, ang_radius_front, ang_radius_back, parallax_diff = disk_geometry(
+        front, back, observer, et, abcorr, observer_radius
+    )
+    return separation - (ang_radius_front + ang_radius_back + parallax_diff)
+
+
+# Event types for surface observers (observer_radius > 0).
+#
+# Solar eclipses (Moon in front of the Sun, observers on the Earth): the
+# eclipse is central if the axis through both bodies hits the Earth, otherwise
+# PARTIAL. On the central line the observer is closer to the Moon than the
+# Earth's centre by the fraction depth of the Earth's radius; the Moon's
+# angular radius grows accordingly (by depth * parallax, relative). TOTAL if
+# the Moon then appears larger than the Sun, otherwise ANNULAR. The
+# corresponding growth of the Sun (below 0.01 %) is neglected
+def solar_eclipse_type(separation, ang_radius_front, ang_radius_back, parallax_diff):
+    if separation >= parallax_diff:
+        return "PARTIAL"
+
+    depth = np.sqrt(1.0 - (np.sin(separation) / np.sin(parallax_diff)) ** 2)
+    topo_ang_radius_front = np.arcsin(
+        np.clip(
+            np.sin(ang_radius_front) / (1.0 - depth * np.sin(parallax_diff)), 0.0, 1.0
+        )
+    )
+    if topo_ang_radius_front > ang_radius_back:
+        return "TOTAL"
+    return "ANNULAR"
+
+
+# Lunar eclipses (Earth in front of the Sun, observers on the Moon): the
+# Moon's surface is in the umbra where the Earth covers the whole Sun, i.e.,
+# where the apparent separation is below ang_radius_front - ang_radius_back.
+# TOTAL: the whole Moon is in the umbra; PARTIAL: a part of the Moon is in
+# the umbra; PENUMBRAL: the Moon is only in the penumbra. The enlargement of
+# the shadow by the Earth's atmosphere is not considered
+def lunar_eclipse_type(separation, ang_radius_front, ang_radius_back, parallax_diff):
+    umbra_radius = ang_radius_front - ang_radius_back
+    if separation < umbra_radius - parallax_diff:
+        return "TOTAL"
+    if separation < umbra_radius + parallax_diff:
+        return "PARTIAL"
+    return "PENUMBRAL"
+
+
+# Step 1: cull the coarse time grid. An interval [et_k, et_k+1] survives if
+# the smaller contact value of its borders is below the largest change of the
+# contact function over the neighbouring intervals (the contact function is
+# smooth; between two samples it cannot dip deeper than its local change).
+# Adjacent surviving intervals are merged into windows
+def candidate_windows(front, back, observer, et_grid, abcorr="LT", observer_radius=0.0):
+    contact = contact_function(front, back, observer, et_grid, abcorr, observer_radius)
+
+    contact_change = np.abs(np.diff(contact))
+    local_change = contact_change.copy()
+    local_change[1:] = np.maximum(local_change[1:], contact_change[:-1])
+    local_change[:-1] = np.maximum(local_change[:-1], contact_change[1:])
+
+    surviving = np.minimum(contact[:-1], contact[1:]) < local_change
+
+    windows = []
+    for interval_idx in np.flatnonzero(surviving):
+        if windows and windows[-1][1] == et_grid[interval_idx]:
+            windows[-1][1] = et_grid[interval_idx + 1]
+        else:
+            windows.append([et_grid[interval_idx], et_grid[interval_idx + 1]])
+
+    return windows
+
+
+# Find the ET of the minimum of func within [et_left, et_right] with a
+# golden-section search. tol is given in seconds
+def golden_section_minimum(func, et_left, et_right, tol=1.0):
+    inv_phi = (np.sqrt(5.0) - 1.0) / 2.0
+    et_c = et_right - inv_phi * (et_right - et_left)
+    et_d = et_left + inv_phi * (et_right - et_left)
+    value_c, value_d = func(et_c), func(et_d)
+    while et_right - et_left > tol:
+        if value_c < value_d:
+            et_right, et_d, value_d = et_d, et_c, value_c
+            et_c = et_right - inv_phi * (et_right - et_left)
+            value_c = func(et_c)
+        else:
+            et_left, et_c, value_c = et_c, et_d, value_d
+            et_d = et_left + inv_phi * (et_right - et_left)
+            value_d = func(et_d)
+
+    return (et_left + et_right) / 2.0
+
+
+# Find the ET between et_out (no contact) and et_in (contact) where the contact
+# starts / ends with a bisection. tol is given in seconds
+def bisect_contact(in_contact, et_out, et_in, tol=1.0):
+    while abs(et_in - et_out) > tol:
+        et_mid = (et_out + et_in) / 2.0
+        if in_contact(et_mid):
+            et_in = et_mid
+        else:
+            et_out = et_mid
+
+    return (et_out + et_in) / 2.0
+
+
+# The occultation / eclipse search. Returns a dataframe with one row per
+# event: start, maximum and end of the event and the type at the maximum.
+#
+# For point observers (observer_radius = 0) the refinement uses the SPICE
+# function occult with the tri-axial ellipsoids of both bodies; the type is
+# TOTAL (back body totally hidden), ANNULAR (front body within the disk of
+# the back body) or PARTIAL. For surface observers (observer_radius > 0) the
+# refinement uses the contact function, i.e. the start and end are the
+# external contacts of the disks for any observer on the surface; the type is
+# determined by event_type_func (default: solar_eclipse_type)
+def find_occultations(
+    front,
+    back,
+    observer,
+    et_start,
+    et_end,
+    coarse_step=6.0 * 3600.0,
+    abcorr="LT",
+    observer_radius=0.0,
+    event_type_func=solar_eclipse_type,
+    tol=1.0,
+):
+    et_grid = np.append(np.arange(et_start, et_end, coarse_step), et_end)
+
+    def contact(et):
+        return contact_function(front, back, observer, et, abcorr, observer_radius)
+
+    if observer_radius == 0.0:
+        front_shape, front_frame = occult_shape(front)
+        back_shape, back_frame = occult_shape(back)
+
+        # occult returns a negative code if target1 (here: the back body) is
+        # occulted by target2 (here: the front body); 0 if there is no
+        # occultation
+        def occult_code(et):
+            return spiceypy.occult(
+                target1=str(back),
+                shape1=back_shape,
+                frame1=back_frame,
+                target2=str(front),
+                shape2=front_shape,
+                frame2=front_frame,
+                abcorr=abcorr,
+                observer=str(observer),
+                et=et,
+            )
+
+        def in_contact(et):
+            return occult_code(et) < 0
+
+        def event_type(et):
+            return {-3: "TOTAL", -2: "ANNULAR", -1: "PARTIAL"}.get(occult_code(et))
+
+    else:
+
+        def in_contact(et):
+            return contact(et) < 0.0
+
+        def event_type(et):
+            return event_type_func(
+                *disk_geometry(front, back, observer, et, abcorr, observer_radius)
+            )
+
+    events = []
+    for et_left, et_right in candidate_windows(
+        front, back, observer, et_grid, abcorr, observer_radius
+    ):
+        # Step 2: the event maximum is the minimum of the contact function.
+        # No contact at the maximum: the bounding spheres were too coarse, no
+        # event
+        et_max = golden_section_minimum(contact, et_left, et_right, tol)
+        if not in_contact(et_max):
+            continue
+
+        et_begin = et_left
+        if not in_contact(et_left):
+            et_begin = bisect_contact(in_contact, et_left, et_max, tol)
+
+        et_finish = et_right
+        if not in_contact(et_right):
+            et_finish = bisect_contact(in_contact, et_right, et_max, tol)
+
+        events.append(
+            {
+                "ET_START": et_begin,
+                "ET_MAX": et_max,
+                "ET_END": et_finish,
+                "UTC_MAX": spiceypy.et2datetime(et=et_max),
+                "DURATION_MIN": (et_finish - et_begin) / 60.0,
+                "TYPE": event_type(et_max),
+            }
+        )
+
+    return pd.DataFrame(
+        events,
+        columns=["ET_START", "ET_MAX", "ET_END", "UTC_MAX", "DURATION_MIN", "TYPE"],
+    )
+
+
+# Search the years 2000 - 2030
+init_time_et = spiceypy.utc2et(
+    datetime.datetime(year=2000, month=1, day=1).strftime("%Y-%m-%dT%H:%M:%S")
+)
+end_time_et = spiceypy.utc2et(
+    datetime.datetime(year=2030, month=1, day=1).strftime("%Y-%m-%dT%H:%M:%S")
+)
+
+# The Earth's equatorial radius
+_, radii_earth = spiceypy.bodvcd(bodyid=399, item="RADII", maxn=3)
+
+# Solar eclipses: the Moon (301) covers the Sun (10) for an observer anywhere
+# on the Earth (399)
+solar_eclipses_df = find_occultations(
+    301, 10, 399, init_time_et, end_time_et, observer_radius=radii_earth[0]
+)
+print(f"Number of solar eclipses: {len(solar_eclipses_df)}")
+print(solar_eclipses_df)
+
+# Lunar eclipses: the Moon (301) enters the Earth's shadow, i.e., for an
+# observer somewhere on the Moon the Earth (399) covers the Sun (10). The
+# start and end are the first and last contact of the Moon's limb with the
+# penumbra (P1 and P4)
+_, radii_moon = spiceypy.bodvcd(bodyid=301, item="RADII", maxn=3)
+lunar_eclipses_df = find_occultations(
+    399,
+    10,
+    301,
+    init_time_et,
+    end_time_et,
+    observer_radius=radii_moon[0],
+    event_type_func=lunar_eclipse_type,
+)
+print(f"Number of lunar eclipses: {len(lunar_eclipses_df)}")
+print(lunar_eclipses_df)
+
+# Occultations of the planets by the Moon as seen from the Earth's centre.
+# Mercury and Venus are searched with their body IDs (199, 299) and thus with
+# their tri-axial shapes. Mars, Jupiter and Saturn are points: de432s only
+# provides their barycentres (4, 5, 6), not the bodies 499, 599, 699
+PLANETS_DICT = {
+    "MERCURY": 199,
+    "VENUS": 299,
+    "MARS": 4,
+    "JUPITER": 5,
+    "SATURN": 6,
+}
+for planet_name, planet_id in PLANETS_DICT.items():
+    occultations_df = find_occultations(301, planet_id, 399, init_time_et, end_time_et)
+    print(
+        f"Number of lunar occultations of {planet_name.capitalize()}: "
+        + f"{len(occultations_df)}"
+    )
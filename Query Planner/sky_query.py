@@ -0,0 +1,206 @@
+import datetime
+import spiceypy
+import numpy as np
+import pandas as pd
+
+# Loading the SPICE kernels
+spiceypy.furnsh("../Kernels/pck/pck00010.tpc.txt")
+spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+
+# Our scripts compute the same positions over and over again: "Planets in the
+# Sky" calls phaseq three times per hour (Venus / Sun, Moon / Sun and
+# Moon / Venus), so the Earth, Moon, Venus and Sun states are computed several
+# times. The ecliptic and equatorial sky maps compute the same Earth - body
+# vectors, just in different frames.
+#
+# Here, we describe the quantities we need as a list of queries. A planner
+# collects all unique (body, observer, correction) states that are needed,
+# computes each of them only once (in one base frame) and derives all
+# requested quantities with vector math and (cached) frame rotations.
+
+
+# A separation query: the angle between body_a and body_b as seen from the
+# observer
+def separation_query(name, observer, body_a, body_b, abcorr="LT+S"):
+    return {
+        "kind": "SEPARATION",
+        "name": name,
+        "observer": observer,
+        "bodies": (body_a, body_b),
+        "abcorr": abcorr,
+    }
+
+
+# A phase angle query with the same arguments as the SPICE function phaseq.
+# The phase angle is the angle at the target between the illumination source
+# and the observer; in other words: the separation between illmn and obsrvr
+# as seen from the target. Note: phaseq applies the light time correction
+# for the illumination source w.r.t. the target only (no stellar aberration),
+# thus the results differ from phaseq in the order of arcseconds
+def phase_angle_query(name, target, illmn, obsrvr, abcorr="LT+S"):
+    return separation_query(name, target, illmn, obsrvr, abcorr)
+
+
+# A longitude / latitude query of a body as seen from the observer in a given
+# frame. The results are stored in the columns {name}_long_rad and
+# {name}_lat_rad
+def lonlat_query(name, body, observer, frame, abcorr="LT+S"):
+    return {
+        "kind": "LONLAT",
+        "name": name,
+        "observer": observer,
+        "bodies": (body,),
+        "frame": frame,
+        "abcorr": abcorr,
+    }
+
+
+# The planner: return the unique states (body, observer, abcorr) that are
+# needed to evaluate all queries. Each state is later computed once per ET in
+# the base frame
+def plan_queries(queries):
+    state_keys = []
+    for query in queries:
+        for body in query["bodies"]:
+            state_key = (body, query["observer"], query["abcorr"])
+            if state_key not in state_keys:
+                state_keys.append(state_key)
+
+    return state_keys
+
+
+# Rotation matrix between two frames. Inertial frames (like J2000 and
+# ECLIPJ2000) do not change in time; their matrix is computed only once and
+# applied to all ETs. For non-inertial frames one matrix per ET is computed.
+# The result has the shape (3, 3) or (T, 3, 3), respectively
+def frame_rotation(from_frame, to_frame, et_array, rotation_cache):
+    cache_key = (from_frame, to_frame)
+    if cache_key not in rotation_cache:
+        inertial = all(
+            spiceypy.frinfo(spiceypy.namfrm(frame))[1] == 1
+            for frame in (from_frame, to_frame)
+        )
+        if inertial:
+            rotation_cache[cache_key] = spiceypy.pxform(
+                fromstr=from_frame, tostr=to_frame, et=et_array[0]
+            )
+        else:
+            rotation_cache[cache_key] = np.array(
+                [
+                    spiceypy.pxform(fromstr=from_frame, tostr=to_frame, et=et)
+                    for et in et_array
+                ]
+            )
+
+    return rotation_cache[cache_key]
+
+
+# Evaluate all queries for the given ETs. Only the requested quantities are
+# computed and returned in a dataframe (one row per ET)
+def evaluate_queries(queries, et_array, base_frame="J2000"):
+    et_array = np.asarray(et_array, dtype=np.float64)
+
+    # Compute every unique state only once. The directional vectors have the
+    # shape (T, 3)
+    states = {}
+    for body, observer, abcorr in plan_queries(queries):
+        states[(body, observer, abcorr)] = np.array(
+            [
+                spiceypy.spkezp(
+                    targ=body, et=et, ref=base_frame, abcorr=abcorr, obs=observer
+                )[0]
+                for et in et_array
+            ]
+        )
+
+    results_df = pd.DataFrame()
+    results_df.loc[:, "ET"] = et_array
+
+    rotation_cache = {}
+    for query in queries:
+        vectors = [
+            states[(body, query["observer"], query["abcorr"])]
+            for body in query["bodies"]
+        ]
+
+        if query["kind"] == "SEPARATION":
+            # Angular separation of the normalised vectors (same as vsep)
+            dir_a = vectors[0] / np.linalg.norm(vectors[0], axis=1, keepdims=True)
+            dir_b = vectors[1] / np.linalg.norm(vectors[1], axis=1, keepdims=True)
+            chord = np.linalg.norm(dir_a - dir_b, axis=1)
+            results_df.loc[:, query["name"]] = np.degrees(
+                2.0 * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+            )
+
+        elif query["kind"] == "LONLAT":
+            vector = vectors[0]
+            if query["frame"] != base_frame:
+                rot_mat = frame_rotation(
+                    base_frame, query["frame"], et_array, rotation_cache
+                )
+                if rot_mat.ndim == 2:
+                    vector = vector @ rot_mat.T
+                else:
+                    vector = np.einsum("tij,tj->ti", rot_mat, vector)
+
+            # Same conventions as recrad: longitude in [0, 2 pi), latitude in
+            # [-pi / 2, pi / 2]
+            results_df.loc[:, f"{query['name']}_long_rad"] = np.mod(
+                np.arctan2(vector[:, 1], vector[:, 0]), 2.0 * np.pi
+            )
+            results_df.loc[:, f"{query['name']}_lat_rad"] = np.arcsin(
+                vector[:, 2] / np.linalg.norm(vector, axis=1)
+            )
+
+        else:
+            raise ValueError(f"Unknown query kind: {query['kind']}")
+
+    return results_df
+
+
+# Set the time interval of "Planets in the Sky": hourly steps between
+# 2023-01-01 and 2024-10-01
+init_time_et = spiceypy.utc2et(
+    datetime.datetime(year=2023, month=1, day=1).strftime("%Y-%m-%dT%H:%M:%S")
+)
+end_time_et = spiceypy.utc2et(
+    datetime.datetime(year=2024, month=10, day=1).strftime("%Y-%m-%dT%H:%M:%S")
+)
+delta_hour_in_seconds = 3600.0
+time_interval_et = np.arange(init_time_et, end_time_et, delta_hour_in_seconds)
+
+SOLSYS_DICT = {
+    "SUN": 10,
+    "MERCURY": 1,
+    "VENUS": 299,
+    "EARTH": 3,
+    "MOON": 301,
+    "MARS": 4,
+    "JUPITER": 5,
+    "SATURN": 6,
+    "URANUS": 7,
+    "NEPTUNE": 8,
+    "PLUTO": 9,
+}
+
+# The three phase angles of "Planets in the Sky" ...
+sky_queries = [
+    phase_angle_query("EARTH_VEN2SUN_ANGLE", target=399, illmn=10, obsrvr=299),
+    phase_angle_query("EARTH_MOON2SUN_ANGLE", target=399, illmn=10, obsrvr=301),
+    phase_angle_query("EARTH_MOON2VEN_ANGLE", target=399, illmn=299, obsrvr=301),
+]
+
+# ... and the ecliptic and equatorial coordinates of the sky map scripts
+for body_name, naif_id in SOLSYS_DICT.items():
+    sky_queries.append(lonlat_query(f"{body_name}_ecl", naif_id, 399, "ECLIPJ2000"))
+    sky_queries.append(lonlat_query(f"{body_name}_equ", naif_id, 399, "J2000"))
+
+# Without the planner, phaseq computes two states per phase angle and each
+# sky map computes one state per body
+print(f"Number of queries: {len(sky_queries)}")
+print(f"Number of states without planner: {3 * 2 + 2 * len(SOLSYS_DICT)}")
+print(f"Number of unique states: {len(plan_queries(sky_queries))}")
+
+sky_df = evaluate_queries(sky_queries, time_interval_et)
+print(sky_df)
@@ -0,0 +1,253 @@
+import datetime
+import threading
+import time
+import spiceypy
+import numpy as np
+from numpy.polynomial import chebyshev
+
+# Loading the SPICE kernels
+spiceypy.furnsh("../Kernels/pck/pck00010.tpc.txt")
+spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+
+# The sky map scripts compute the positions for a single "now" with spkezp
+# and recrad. To point / track a telescope or antenna at 50 - 100 Hz this is
+# too slow (and CSPICE should not be called from a real-time loop at all).
+#
+# Here, at the start of a tracking session, the apparent direction of each
+# body is sampled for the next few hours and approximated by Chebyshev
+# polynomials (one per x, y, z component of the unit vector in J2000). A
+# query evaluates the polynomials and converts the vector into RA / Dec
+# (J2000) and ecliptic longitude / latitude (ECLIPJ2000); no SPICE call is
+# needed. A background thread computes the next fit before the current one
+# expires.
+
+
+# Fit the apparent direction of a body (as seen from the observer) between
+# et_start and et_end. The degree is increased until the angular error at
+# check points between the fit nodes is below tolerance (in radians)
+def fit_direction(
+    naif_id,
+    et_start,
+    et_end,
+    degree=6,
+    max_degree=20,
+    tolerance=np.radians(0.1 / 3600.0),
+    ref="J2000",
+    abcorr="LT+S",
+    obs=399,
+):
+    def directions(nodes):
+        et_nodes = (et_start + et_end) / 2.0 + nodes * (et_end - et_start) / 2.0
+        dirs = np.array(
+            [
+                spiceypy.spkezp(targ=naif_id, et=et, ref=ref, abcorr=abcorr, obs=obs)[0]
+                for et in et_nodes
+            ]
+        )
+        return dirs / np.linalg.norm(dirs, axis=1, keepdims=True)
+
+    while True:
+        # Chebyshev nodes (twice the number of coefficients; least squares
+        # fit) and check points in between
+        nr_of_nodes = 2 * (degree + 1)
+        nodes = np.cos(np.pi * (np.arange(nr_of_nodes) + 0.5) / nr_of_nodes)
+        coeffs = chebyshev.chebfit(nodes, directions(nodes), degree)
+
+        check_points = (nodes[:-1] + nodes[1:]) / 2.0
+        check_dirs = directions(check_points)
+        fit_dirs = chebyshev.chebval(check_points, coeffs).T
+        fit_dirs /= np.linalg.norm(fit_dirs, axis=1, keepdims=True)
+        max_error = np.max(
+            2.0 * np.arcsin(np.linalg.norm(fit_dirs - check_dirs, axis=1) / 2.0)
+        )
+
+        if max_error < tolerance or degree >= max_degree:
+            return {
+                "NAIF_ID": naif_id,
+                "ET_START": et_start,
+                "ET_END": et_end,
+                "COEFFS": coeffs,
+                "MAX_ERROR_RAD": max_error,
+            }
+
+        degree += 2
+
+
+# Evaluate a fit at et. Returns the (not normalised) directional vector
+def evaluate_fit(fit, et):
+    x = (2.0 * et - fit["ET_START"] - fit["ET_END"]) / (fit["ET_END"] - fit["ET_START"])
+    return chebyshev.chebval(x, fit["COEFFS"])
+
+
+# Longitude and latitude of a vector (same conventions as recrad)
+def vector_lonlat(vector):
+    lon = np.arctan2(vector[1], vector[0]) % (2.0 * np.pi)
+    lat = np.arcsin(vector[2] / np.sqrt(vector @ vector))
+    return lon, lat
+
+
+# A tracking session for a set of bodies. The fits cover fit_span seconds;
+# refit_margin seconds before a fit expires, the background thread computes
+# the next fit (overlapping by refit_margin).
+#
+# CSPICE is not thread-safe: all SPICE calls of the session hold spice_lock.
+# Pass the lock that the rest of the application uses for its SPICE calls
+# (default: a new lock, available as the attribute spice_lock)
+class TrackingSession:
+    def __init__(
+        self,
+        body_dict,
+        fit_span=4.0 * 3600.0,
+        refit_margin=30.0 * 60.0,
+        check_interval=10.0,
+        spice_lock=None,
+        **fit_kwargs,
+    ):
+        self.body_dict = dict(body_dict)
+        self.spice_lock = threading.Lock() if spice_lock is None else spice_lock
+        self.fit_span = fit_span
+        self.refit_margin = refit_margin
+        self.check_interval = check_interval
+        self.fit_kwargs = fit_kwargs
+
+        # Link the ET to a monotonic clock: the ET is then computed without
+        # SPICE
+        with self.spice_lock:
+            utc_now = datetime.datetime.now(datetime.timezone.utc)
+            self._et_0 = spiceypy.utc2et(utc_now.strftime("%Y-%m-%dT%H:%M:%S.%f"))
+            self._clock_0 = time.monotonic()
+
+            # J2000 and ECLIPJ2000 are inertial frames; the matrix is constant
+            self._equ2ecl_mat = spiceypy.pxform(
+                fromstr="J2000", tostr="ECLIPJ2000", et=self._et_0
+            )
+
+            # The fits of each body, sorted by time. The lists are never
+            # changed in place; the background thread replaces them. Readers
+            # thus always see a consistent list
+            self._fits = {
+                body_name: [
+                    fit_direction(
+                        naif_id, self._et_0, self._et_0 + fit_span, **fit_kwargs
+                    )
+                ]
+                for body_name, naif_id in self.body_dict.items()
+            }
+
+        # The last error of the background refit per body (None: no error)
+        self._refit_errors = {body_name: None for body_name in self.body_dict}
+
+        self._stop_event = threading.Event()
+        self._refit_thread = threading.Thread(target=self._refit_loop, daemon=True)
+        self._refit_thread.start()
+
+    # Current ET derived from the monotonic clock
+    def now_et(self):
+        return self._et_0 + (time.monotonic() - self._clock_0)
+
+    # Return RA, Dec (J2000) and ecliptic longitude, latitude (ECLIPJ2000) in
+    # radians of a body for et (default: now)
+    def query(self, body_name, et=None):
+        et = self.now_et() if et is None else et
+        for fit in reversed(self._fits[body_name]):
+            if fit["ET_START"] <= et <= fit["ET_END"]:
+                break
+        else:
+            refit_error = self._refit_errors[body_name]
+            if refit_error is not None:
+                raise RuntimeError(
+                    f"No fit of {body_name} covers ET {et}; the background refit "
+                    + f"failed: {refit_error!r}"
+                ) from refit_error
+            raise ValueError(f"No fit of {body_name} covers ET {et}")
+
+        vector_equ = evaluate_fit(fit, et)
+        ra, dec = vector_lonlat(vector_equ)
+        ecl_lon, ecl_lat = vector_lonlat(self._equ2ecl_mat @ vector_equ)
+
+        return ra, dec, ecl_lon, ecl_lat
+
+    # Stop the background thread
+    def close(self):
+        self._stop_event.set()
+        self._refit_thread.join()
+
+    # Background thread: compute the next fit before the current one expires
+    # and remove the fits that have already expired. This is the only place
+    # (besides the constructor) where SPICE is called. A failed refit is
+    # recorded (and reported by query) and retried at the next check
+    def _refit_loop(self):
+        while not self._stop_event.wait(self.check_interval):
+            et_now = self.now_et()
+            for body_name, naif_id in self.body_dict.items():
+                body_fits = self._fits[body_name]
+                last_fit_end = body_fits[-1]["ET_END"]
+                if last_fit_end - et_now > self.refit_margin:
+                    continue
+
+                # After failed refits the last fit may have expired already;
+                # the next fit then starts now
+                next_start = max(last_fit_end - self.refit_margin, et_now)
+                try:
+                    with self.spice_lock:
+                        next_fit = fit_direction(
+                            naif_id,
+                            next_start,
+                            next_start + self.fit_span,
+                            **self.fit_kwargs,
+                        )
+                except Exception as refit_error:
+                    self._refit_errors[body_name] = refit_error
+                    continue
+
+                self._refit_errors[body_name] = None
+                self._fits[body_name] = [
+                    fit for fit in body_fits if fit["ET_END"] >= et_now
+                ] + [next_fit]
+
+
+# Some bodies of the sky map scripts
+TRACKING_DICT = {
+    "SUN": 10,
+    "VENUS": 299,
+    "MOON": 301,
+    "MARS": 4,
+    "JUPITER": 5,
+}
+
+tracking_session = TrackingSession(TRACKING_DICT)
+
+# Compare the fit with the full SPICE computation. The SPICE calls share the
+# lock with the background refit
+et_now = tracking_session.now_et()
+for body_name, naif_id in TRACKING_DICT.items():
+    ra_fit, dec_fit, _, _ = tracking_session.query(body_name, et_now)
+    with tracking_session.spice_lock:
+        _, ra_spice, dec_spice = spiceypy.recrad(
+            spiceypy.spkezp(
+                targ=naif_id, et=et_now, ref="J2000", abcorr="LT+S", obs=399
+            )[0]
+        )
+    print(
+        f"{body_name}: RA / Dec difference fit - SPICE in arcsec: "
+        + f"{np.degrees(ra_fit - ra_spice) * 3600.0:.4f} / "
+        + f"{np.degrees(dec_fit - dec_spice) * 3600.0:.4f}"
+    )
+
+# Simulate a 100 Hz tracking loop for 2 seconds and measure the query time
+query_times = []
+for _ in range(200):
+    tick_start = time.perf_counter()
+    pointing = {
+        body_name: tracking_session.query(body_name) for body_name in TRACKING_DICT
+    }
+    query_times.append(time.perf_counter() - tick_start)
+    time.sleep(0.01)
+
+print(
+    f"Mean time per tick ({len(TRACKING_DICT)} bodies) in microseconds: "
+    + f"{np.mean(query_times) * 1e6:.1f}"
+)
+
+tracking_session.close()
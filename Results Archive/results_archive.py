@@ -0,0 +1,154 @@
+import datetime
+import spiceypy
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Loading the SPICE kernels
+spiceypy.furnsh("../Kernels/pck/pck00010.tpc.txt")
+spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+
+# All our scripts store their results in pandas dataframes, where vectors are
+# stored as numpy arrays in "object" columns (e.g. "POS_SSB_WRT_SUN"). These
+# columns cannot be stored efficiently, and other programs cannot read them.
+# Here, we write the results into a columnar Parquet file: each vector column
+# is split into separate x, y, z columns, the rows are sorted by the ET and
+# the file is written in row groups that store min / max statistics. A reader
+# can then skip all row groups outside of a requested ET range.
+
+# Suffixes of the flattened vector components (position: x, y, z; state
+# vectors additionally have the velocities vx, vy, vz)
+VECTOR_SUFFIXES = {
+    3: ["X", "Y", "Z"],
+    6: ["X", "Y", "Z", "VX", "VY", "VZ"],
+}
+
+
+# Convert a results dataframe into a flat, typed dataframe. Vector columns are
+# split into one float column per component, date-time columns are converted
+# to datetime64 and the rows are sorted by the ET
+def flatten_results(results_df, et_col="ET"):
+    flat_df = pd.DataFrame(index=results_df.index)
+    for col_name in results_df.columns:
+        col = results_df[col_name]
+        first_value = col.iloc[0] if len(col) > 0 else None
+
+        if isinstance(first_value, (np.ndarray, list, tuple)) and (
+            len(first_value) in VECTOR_SUFFIXES
+        ):
+            components = np.vstack(col.to_numpy()).astype(np.float64)
+            for comp_idx, suffix in enumerate(VECTOR_SUFFIXES[len(first_value)]):
+                flat_df.loc[:, f"{col_name}_{suffix}"] = components[:, comp_idx]
+        elif isinstance(first_value, (datetime.date, datetime.datetime)):
+            flat_df.loc[:, col_name] = pd.to_datetime(col)
+        else:
+            flat_df.loc[:, col_name] = col.to_numpy()
+
+    return flat_df.sort_values(et_col).reset_index(drop=True)
+
+
+# Write one or several results dataframes into a Parquet file. results can be
+# a single dataframe or an iterable of dataframes (e.g. chunks of a long
+# computation) that are given in ascending ET order; this way, archives that
+# are larger than the memory can be written
+def write_results(results, file_path, et_col="ET", row_group_size=100_000):
+    if isinstance(results, pd.DataFrame):
+        results = [results]
+
+    writer = None
+    last_et = -np.inf
+    try:
+        for results_df in results:
+            # The column types are derived from the values; an empty chunk
+            # has no values (and nothing to write)
+            if len(results_df) == 0:
+                continue
+
+            table = pa.Table.from_pandas(
+                flatten_results(results_df, et_col), preserve_index=False
+            )
+
+            # All chunks must have the columns and types of the first chunk
+            if writer is not None and not table.schema.equals(writer.schema):
+                raise ValueError(
+                    "Chunk schema does not match the schema of the file:\n"
+                    f"chunk: {table.schema}\nfile: {writer.schema}"
+                )
+
+            # The ET statistics of the row groups are only useful if the whole
+            # file is sorted; chunks must not overlap
+            chunk_et = table.column(et_col)
+            if chunk_et[0].as_py() < last_et:
+                raise ValueError(
+                    f"Results are not sorted by {et_col}: chunk starts at "
+                    f"{chunk_et[0].as_py()}, previous chunk ended at {last_et}"
+                )
+            last_et = chunk_et[-1].as_py()
+
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    file_path,
+                    table.schema,
+                    write_statistics=True,
+                    sorting_columns=[
+                        pq.SortingColumn(table.schema.get_field_index(et_col))
+                    ],
+                )
+            writer.write_table(table, row_group_size=row_group_size)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# Read a Parquet results file. The file is memory-mapped and the ET range
+# [et_min, et_max] is pushed down to the reader: row groups whose ET
+# statistics are outside of the range are not read at all
+def read_results(file_path, et_min=None, et_max=None, columns=None, et_col="ET"):
+    filters = []
+    if et_min is not None:
+        filters.append((et_col, ">=", et_min))
+    if et_max is not None:
+        filters.append((et_col, "<=", et_max))
+
+    table = pq.read_table(
+        file_path,
+        columns=columns,
+        filters=filters or None,
+        memory_map=True,
+    )
+    return table.to_pandas()
+
+
+# As an example we store the position of the Solar System Barycentre (SSB)
+# w.r.t. the Sun (see "Gravitational Pull") for 10000 days
+init_time_utc = datetime.datetime(year=2000, month=1, day=1, hour=0, minute=0, second=0)
+delta_days = 10000
+end_time_utc = init_time_utc + datetime.timedelta(days=delta_days)
+
+# Convert to Ephemeris Time (ET) using the SPICE function utc2et
+init_time_et = spiceypy.utc2et(init_time_utc.strftime("%Y-%m-%dT%H:%M:%S"))
+end_time_et = spiceypy.utc2et(end_time_utc.strftime("%Y-%m-%dT%H:%M:%S"))
+
+time_interval_et = np.linspace(init_time_et, end_time_et, delta_days)
+
+solar_system_df = pd.DataFrame()
+solar_system_df.loc[:, "ET"] = time_interval_et
+solar_system_df.loc[:, "UTC"] = solar_system_df["ET"].apply(
+    lambda x: spiceypy.et2datetime(et=x)
+)
+solar_system_df.loc[:, "POS_SSB_WRT_SUN"] = solar_system_df["ET"].apply(
+    lambda x: spiceypy.spkgps(targ=0, et=x, ref="ECLIPJ2000", obs=10)[0]
+)
+
+# Write the results in row groups of 1000 days
+write_results(solar_system_df, "ssb_wrt_sun.parquet", row_group_size=1000)
+
+# Read back only the year 2010. Only the matching row groups are loaded
+slice_df = read_results(
+    "ssb_wrt_sun.parquet",
+    et_min=spiceypy.utc2et("2010-01-01T00:00:00"),
+    et_max=spiceypy.utc2et("2011-01-01T00:00:00"),
+)
+print(slice_df)
@@ -0,0 +1,220 @@
+import datetime
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import spiceypy
+import numpy as np
+import pandas as pd
+
+# Loading the SPICE kernels
+spiceypy.furnsh("../Kernels/pck/pck00010.tpc.txt")
+spiceypy.furnsh("../Kernels/pck/gm_de431.tpc.txt")
+spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+
+# "Solar System Barycenter" and "Gravitational Pull" showed that the movement
+# of the Solar System Barycentre (SSB) w.r.t. the Sun is driven by the orbital
+# periods of the planets. So far, this could only be judged by eye. Here, we
+# compute the power spectrum of the SSB - Sun vector and assign the peaks to
+# the planets' periods.
+#
+# Long time spans are processed in chunks: the positions are streamed from
+# the SPK, cut into overlapping segments and the periodograms of the segments
+# are averaged (Welch's method). Only one segment (plus one chunk) is kept in
+# memory at a time, and the FFTs of the segments are computed on all CPU
+# cores. For non-uniform time grids (e.g. from "Adaptive Sampling") the
+# Lomb-Scargle periodogram is provided.
+
+# Planet barycentres that drive the SSB movement
+NAIF_ID_DICT = {
+    "MER": 1,
+    "VEN": 2,
+    "EAR": 3,
+    "MAR": 4,
+    "JUP": 5,
+    "SAT": 6,
+    "URA": 7,
+    "NEP": 8,
+    "PLU": 9,
+}
+
+# Seconds per day; the spectra are given in 1 / day
+DAY_IN_SECONDS = 86400.0
+
+
+# Stream the position of the SSB w.r.t. the Sun (ECLIPJ2000) between et_start
+# and et_end with the sample spacing step (in seconds). Yields arrays with the
+# shape (chunk_size, 3)
+def ssb_wrt_sun_chunks(et_start, et_end, step, chunk_size=10_000):
+    nr_of_samples = int(np.floor((et_end - et_start) / step)) + 1
+    for chunk_start in range(0, nr_of_samples, chunk_size):
+        chunk_idx = np.arange(chunk_start, min(chunk_start + chunk_size, nr_of_samples))
+        chunk_et = et_start + chunk_idx * step
+        chunk_pos, _ = spiceypy.spkpos("0", chunk_et, "ECLIPJ2000", "NONE", "10")
+        yield np.atleast_2d(chunk_pos)
+
+
+# Periodogram of a single segment (shape (nperseg, nr_of_components)): remove
+# the mean, apply the window and sum the power of all components. This
+# function runs in the worker processes
+def segment_periodogram(segment, window):
+    segment = segment - segment.mean(axis=0)
+    spectrum = np.fft.rfft(segment * window[:, np.newaxis], axis=0)
+    return np.sum(np.abs(spectrum) ** 2, axis=1)
+
+
+# Welch's method on a stream of chunks (each with the shape
+# (chunk_length, nr_of_components)). The segments have a length of nperseg
+# samples and overlap by noverlap samples (default: 50 %). sample_spacing is
+# given in days. Returns the frequencies (1 / day) and the one-sided power
+# spectral density
+def streamed_welch(chunks, nperseg, sample_spacing, noverlap=None, max_workers=None):
+    noverlap = nperseg // 2 if noverlap is None else noverlap
+    segment_step = nperseg - noverlap
+    window = np.hanning(nperseg)
+    max_workers = max_workers or os.cpu_count()
+
+    psd_sum = np.zeros(nperseg // 2 + 1)
+    nr_of_segments = 0
+    buffer = None
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = []
+        for chunk in chunks:
+            buffer = chunk if buffer is None else np.vstack((buffer, chunk))
+            while len(buffer) >= nperseg:
+                pending.append(
+                    executor.submit(segment_periodogram, buffer[:nperseg], window)
+                )
+                buffer = buffer[segment_step:]
+
+            # Do not queue more segments than needed to keep all workers busy;
+            # this bounds the memory
+            while len(pending) > 2 * max_workers:
+                psd_sum += pending.pop(0).result()
+                nr_of_segments += 1
+
+        for future in pending:
+            psd_sum += future.result()
+            nr_of_segments += 1
+
+    if nr_of_segments == 0:
+        raise ValueError(f"Time series is shorter than one segment ({nperseg} samples)")
+
+    # One-sided power spectral density: double all frequencies except 0 and
+    # (for even nperseg) the Nyquist frequency
+    psd = psd_sum / nr_of_segments * sample_spacing / np.sum(window**2)
+    psd[1 : (nperseg + 1) // 2] *= 2.0
+
+    return np.fft.rfftfreq(nperseg, d=sample_spacing), psd
+
+
+# Lomb-Scargle periodogram of a non-uniformly sampled series. time and values
+# are 1-dimensional arrays, frequencies are given in 1 / time unit. The
+# frequencies are processed in blocks to bound the memory
+def lomb_scargle(time, values, frequencies, block_size=None):
+    time = np.asarray(time, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64) - np.mean(values)
+    block_size = block_size or max(1, 10_000_000 // len(time))
+
+    power = np.empty(len(frequencies))
+    for block_start in range(0, len(frequencies), block_size):
+        omega = 2.0 * np.pi * frequencies[block_start : block_start + block_size]
+        omega_t = omega[:, np.newaxis] * time[np.newaxis, :]
+
+        tau = np.arctan2(
+            np.sum(np.sin(2.0 * omega_t), axis=1), np.sum(np.cos(2.0 * omega_t), axis=1)
+        ) / (2.0 * omega)
+        phase = omega_t - (omega * tau)[:, np.newaxis]
+        cos_phase, sin_phase = np.cos(phase), np.sin(phase)
+
+        power[block_start : block_start + block_size] = 0.5 * (
+            (cos_phase @ values) ** 2 / np.sum(cos_phase**2, axis=1)
+            + (sin_phase @ values) ** 2 / np.sum(sin_phase**2, axis=1)
+        )
+
+    return power
+
+
+# Sidereal orbital periods (in days) of the planets w.r.t. the Sun, derived
+# from the osculating elements at et and the GM of the Sun
+def planet_periods(et):
+    _, gm_sun = spiceypy.bodvcd(bodyid=10, item="GM", maxn=1)
+    periods = {}
+    for planet_abr, planet_id in NAIF_ID_DICT.items():
+        planet_state, _ = spiceypy.spkgeo(targ=planet_id, et=et, ref="ECLIPJ2000", obs=10)
+        rp, ecc = spiceypy.oscelt(planet_state, et, gm_sun[0])[:2]
+        semi_major_axis = rp / (1.0 - ecc)
+        periods[planet_abr] = (
+            2.0 * np.pi * np.sqrt(semi_major_axis**3 / gm_sun[0]) / DAY_IN_SECONDS
+        )
+
+    return periods
+
+
+# Candidate periods: the sidereal periods of the planets and the synodic
+# periods of all planet pairs (1 / P_syn = |1 / P_a - 1 / P_b|)
+def candidate_periods(periods):
+    candidates = dict(periods)
+    for (abr_a, period_a), (abr_b, period_b) in itertools.combinations(
+        periods.items(), 2
+    ):
+        candidates[f"{abr_a}-{abr_b}"] = 1.0 / abs(1.0 / period_a - 1.0 / period_b)
+
+    return candidates
+
+
+# Find the nr_of_peaks strongest local maxima of the spectrum and assign each
+# peak to the candidate periods whose frequency is within the frequency
+# resolution of the spectrum (sorted by the frequency difference). At low
+# frequencies several candidates may fall into one frequency bin; such peaks
+# are flagged as ambiguous and list all matching candidates
+def attribute_peaks(frequencies, psd, candidates, nr_of_peaks=10):
+    local_max = np.flatnonzero((psd[1:-1] > psd[:-2]) & (psd[1:-1] > psd[2:])) + 1
+    peak_idx = local_max[np.argsort(psd[local_max])[::-1][:nr_of_peaks]]
+    freq_resolution = frequencies[1] - frequencies[0]
+
+    candidate_names = list(candidates)
+    candidate_freqs = np.array([1.0 / candidates[name] for name in candidate_names])
+
+    peaks = []
+    for idx in peak_idx:
+        freq_diff = np.abs(candidate_freqs - frequencies[idx])
+        matching = [
+            candidate_names[cand_idx]
+            for cand_idx in np.argsort(freq_diff)
+            if freq_diff[cand_idx] < freq_resolution
+        ]
+        peaks.append(
+            {
+                "PERIOD_DAYS": 1.0 / frequencies[idx],
+                "PSD": psd[idx],
+                "ATTRIBUTION": matching,
+                "CANDIDATE_PERIODS_DAYS": [candidates[name] for name in matching],
+                "AMBIGUOUS": len(matching) > 1,
+            }
+        )
+
+    return pd.DataFrame(peaks)
+
+
+# The computation is only started if the script is executed directly: the
+# worker processes import this module and must not start the analysis again
+if __name__ == "__main__":
+    # The de432s kernel covers the years 1950 - 2050. For multi-century spans
+    # load a kernel with a longer coverage (e.g. de440)
+    init_time_utc = datetime.datetime(year=1950, month=1, day=2)
+    end_time_utc = datetime.datetime(year=2049, month=12, day=31)
+
+    init_time_et = spiceypy.utc2et(init_time_utc.strftime("%Y-%m-%dT%H:%M:%S"))
+    end_time_et = spiceypy.utc2et(end_time_utc.strftime("%Y-%m-%dT%H:%M:%S"))
+
+    # Daily samples; segments of 2^14 days (around 45 years) to resolve the
+    # periods of Jupiter and Saturn and their synodic period
+    ssb_chunks = ssb_wrt_sun_chunks(init_time_et, end_time_et, DAY_IN_SECONDS)
+    frequencies, psd = streamed_welch(ssb_chunks, nperseg=2**14, sample_spacing=1.0)
+
+    periods = planet_periods(init_time_et)
+    peaks_df = attribute_peaks(frequencies, psd, candidate_periods(periods))
+
+    print("Strongest periods of the SSB movement w.r.t. the Sun:")
+    print(peaks_df)
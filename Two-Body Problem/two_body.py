@@ -0,0 +1,349 @@
+import datetime
+import time
+import spiceypy
+import numpy as np
+
+# Loading the SPICE kernels. The G*M values are taken from the GM kernel
+spiceypy.furnsh("../Kernels/lsk/naif0012.tls.txt")
+spiceypy.furnsh("../Kernels/spk/de432s.bsp")
+spiceypy.furnsh("../Kernels/pck/gm_de431.tpc.txt")
+
+# In "Velocity of the Earth" we computed a single orbital speed with the
+# vis-viva equation and compared it with the SPK velocity. For whole
+# populations (e.g. asteroid catalogues with millions of objects) calling
+# oscelt / conics per object is far too slow. Here, the conversion between
+# state vectors and osculating elements, as well as the propagation, is done
+# with numpy for whole arrays of bodies at once.
+#
+# The elements are stored like the output of the SPICE function oscelt; one
+# row per body:
+# rp (perifocal distance), ecc (eccentricity), inc (inclination), lnode
+# (longitude of the ascending node), argp (argument of periapsis), m0 (mean
+# anomaly at epoch), t0 (epoch), mu (G*M)
+
+# Eccentricities closer than this value to 1 are treated as parabolic
+PARABOLIC_TOL = 1e-9
+
+# Inclinations and eccentricities below this value are treated as equatorial
+# and circular, respectively
+SINGULAR_TOL = 1e-11
+
+
+# Get the G*M value of a body from the GM kernel
+def body_gm(naif_id):
+    _, gm_value = spiceypy.bodvcd(bodyid=naif_id, item="GM", maxn=1)
+    return gm_value[0]
+
+
+# Stumpff functions C(z) and S(z) of the universal variable formulation. Both
+# are defined for elliptic (z > 0), hyperbolic (z < 0) and parabolic (z = 0)
+# orbits; near 0 the series expansion is used
+def stumpff_c(z):
+    z = np.asarray(z, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sqrt_pos = np.sqrt(np.abs(z))
+        c_value = np.where(
+            z > 0,
+            (1.0 - np.cos(sqrt_pos)) / z,
+            (np.cosh(sqrt_pos) - 1.0) / -z,
+        )
+    return np.where(np.abs(z) < 1e-6, 1.0 / 2.0 - z / 24.0 + z**2 / 720.0, c_value)
+
+
+def stumpff_s(z):
+    z = np.asarray(z, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sqrt_pos = np.sqrt(np.abs(z))
+        s_value = np.where(
+            z > 0,
+            (sqrt_pos - np.sin(sqrt_pos)) / sqrt_pos**3,
+            (np.sinh(sqrt_pos) - sqrt_pos) / sqrt_pos**3,
+        )
+    return np.where(np.abs(z) < 1e-6, 1.0 / 6.0 - z / 120.0 + z**2 / 5040.0, s_value)
+
+
+# Propagate state vectors (shape (N, 6)) by the time steps dt (shape (N,) or
+# scalar, in seconds) with the universal Kepler equation. The equation is
+# solved with the Laguerre-Conway method, which converges for all conic types
+def propagate_states(states, dt, mu, max_iter=50, tol=1e-12):
+    states = np.atleast_2d(np.asarray(states, dtype=np.float64))
+    dt = np.broadcast_to(np.asarray(dt, dtype=np.float64), states.shape[:1])
+    mu = np.broadcast_to(np.asarray(mu, dtype=np.float64), states.shape[:1])
+
+    pos_0, vel_0 = states[:, :3], states[:, 3:]
+    r_0 = np.linalg.norm(pos_0, axis=1)
+    sqrt_mu = np.sqrt(mu)
+    rdotv_0 = np.sum(pos_0 * vel_0, axis=1) / sqrt_mu
+    alpha = 2.0 / r_0 - np.sum(vel_0**2, axis=1) / mu
+
+    # Closed orbits: a full orbit does not change the state; remove multiples
+    # of the orbital period to keep the universal anomaly small. The steps are
+    # reduced into [-period / 2, period / 2]; small negative steps thus stay
+    # small (and precise) instead of becoming almost a full period
+    elliptic = alpha > 0
+    period = np.where(elliptic, 2.0 * np.pi / np.sqrt(mu * np.abs(alpha) ** 3), 1.0)
+    dt = np.where(elliptic, dt - period * np.round(dt / period), dt)
+
+    # Initial guess of the universal anomaly chi (see Vallado, "Fundamentals
+    # of Astrodynamics and Applications"). Elliptic orbits: linear in time;
+    # hyperbolic orbits: logarithmic estimate; (near) parabolic orbits: small
+    # time step estimate
+    hyperbolic = alpha < -1e-12 / r_0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        semi_major_hyp = np.where(hyperbolic, 1.0 / alpha, -1.0)
+        chi_hyp = (
+            np.sign(dt)
+            * np.sqrt(-semi_major_hyp)
+            * np.log(
+                (-2.0 * mu * alpha * dt)
+                / (
+                    rdotv_0 * sqrt_mu
+                    + np.sign(dt)
+                    * np.sqrt(-mu * semi_major_hyp)
+                    * (1.0 - r_0 * alpha)
+                )
+            )
+        )
+    chi = np.select(
+        [elliptic, hyperbolic & np.isfinite(chi_hyp)],
+        [sqrt_mu * alpha * dt, chi_hyp],
+        default=sqrt_mu * dt / r_0,
+    )
+
+    # Iterate only the bodies that have not converged yet
+    laguerre_n = 5.0
+    active = np.arange(len(chi))
+    for _ in range(max_iter):
+        chi_a, alpha_a, r_0_a = chi[active], alpha[active], r_0[active]
+        rdotv_0_a = rdotv_0[active]
+
+        z = alpha_a * chi_a**2
+        c_z, s_z = stumpff_c(z), stumpff_s(z)
+
+        func = (
+            rdotv_0_a * chi_a**2 * c_z
+            + (1.0 - alpha_a * r_0_a) * chi_a**3 * s_z
+            + r_0_a * chi_a
+            - sqrt_mu[active] * dt[active]
+        )
+        dfunc = (
+            rdotv_0_a * chi_a * (1.0 - z * s_z)
+            + (1.0 - alpha_a * r_0_a) * chi_a**2 * c_z
+            + r_0_a
+        )
+        ddfunc = rdotv_0_a * (1.0 - z * c_z) + (1.0 - alpha_a * r_0_a) * chi_a * (
+            1.0 - z * s_z
+        )
+
+        root = np.sqrt(
+            np.abs(
+                (laguerre_n - 1.0) ** 2 * dfunc**2
+                - laguerre_n * (laguerre_n - 1.0) * func * ddfunc
+            )
+        )
+        delta = laguerre_n * func / (dfunc + np.sign(dfunc) * root)
+        chi[active] = chi_a - delta
+
+        active = active[np.abs(delta) > tol * np.maximum(np.abs(chi_a), 1.0)]
+        if len(active) == 0:
+            break
+
+    # Lagrange coefficients f, g and their derivatives
+    z = alpha * chi**2
+    c_z, s_z = stumpff_c(z), stumpff_s(z)
+
+    f_coef = 1.0 - chi**2 / r_0 * c_z
+    g_coef = dt - chi**3 / sqrt_mu * s_z
+    pos = f_coef[:, np.newaxis] * pos_0 + g_coef[:, np.newaxis] * vel_0
+    r = np.linalg.norm(pos, axis=1)
+
+    fdot_coef = sqrt_mu / (r * r_0) * (z * s_z - 1.0) * chi
+    gdot_coef = 1.0 - chi**2 / r * c_z
+    vel = fdot_coef[:, np.newaxis] * pos_0 + gdot_coef[:, np.newaxis] * vel_0
+
+    return np.hstack((pos, vel))
+
+
+# Mean motion of the elements. For parabolic orbits the mean anomaly follows
+# Barker's equation D + D^3 / 3 = sqrt(mu / (2 rp^3)) * (t - tp), with
+# D = tan(nu / 2)
+def mean_motion(rp, ecc, mu):
+    parabolic = np.abs(ecc - 1.0) < PARABOLIC_TOL
+    with np.errstate(divide="ignore"):
+        semi_major_abs = np.abs(rp / (1.0 - ecc))
+    return np.where(
+        parabolic, np.sqrt(mu / (2.0 * rp**3)), np.sqrt(mu / semi_major_abs**3)
+    )
+
+
+# Convert state vectors (shape (N, 6)) at the epochs et (shape (N,) or
+# scalar) into osculating elements (shape (N, 8)); the vectorised version of
+# oscelt
+def states_to_elements(states, et, mu):
+    states = np.atleast_2d(np.asarray(states, dtype=np.float64))
+    et = np.broadcast_to(np.asarray(et, dtype=np.float64), states.shape[:1])
+    mu = np.broadcast_to(np.asarray(mu, dtype=np.float64), states.shape[:1])
+
+    pos, vel = states[:, :3], states[:, 3:]
+    r = np.linalg.norm(pos, axis=1)
+    v_sq = np.sum(vel**2, axis=1)
+
+    # Angular momentum vector, node vector and eccentricity vector
+    h_vec = np.cross(pos, vel)
+    h = np.linalg.norm(h_vec, axis=1)
+    h_hat = h_vec / h[:, np.newaxis]
+    node_vec = np.column_stack((-h_vec[:, 1], h_vec[:, 0], np.zeros_like(h)))
+    node = np.linalg.norm(node_vec, axis=1)
+    ecc_vec = (
+        (v_sq - mu / r)[:, np.newaxis] * pos
+        - np.sum(pos * vel, axis=1)[:, np.newaxis] * vel
+    ) / mu[:, np.newaxis]
+    ecc = np.linalg.norm(ecc_vec, axis=1)
+
+    inc = np.arccos(np.clip(h_vec[:, 2] / h, -1.0, 1.0))
+
+    # For equatorial orbits the node is undefined: use the x axis (lnode = 0)
+    equatorial = node < SINGULAR_TOL * h
+    node_hat = np.where(
+        equatorial[:, np.newaxis],
+        np.array([1.0, 0.0, 0.0]),
+        node_vec / np.where(equatorial, 1.0, node)[:, np.newaxis],
+    )
+    lnode = np.mod(np.arctan2(node_hat[:, 1], node_hat[:, 0]), 2.0 * np.pi)
+
+    # For circular orbits the periapsis is undefined: use the node (argp = 0)
+    circular = ecc < SINGULAR_TOL
+    ecc_hat = np.where(
+        circular[:, np.newaxis],
+        node_hat,
+        ecc_vec / np.where(circular, 1.0, ecc)[:, np.newaxis],
+    )
+
+    # Signed angles within the orbital plane
+    def plane_angle(from_hat, to_vec):
+        return np.arctan2(
+            np.sum(np.cross(from_hat, to_vec) * h_hat, axis=1),
+            np.sum(from_hat * to_vec, axis=1),
+        )
+
+    argp = np.mod(plane_angle(node_hat, ecc_hat), 2.0 * np.pi)
+    true_anomaly = plane_angle(ecc_hat, pos)
+
+    rp = h**2 / mu / (1.0 + ecc)
+
+    # Mean anomaly at epoch for each conic type
+    half_tan = np.tan(true_anomaly / 2.0)
+    with np.errstate(invalid="ignore"):
+        ecc_anomaly = 2.0 * np.arctan(np.sqrt((1.0 - ecc) / (1.0 + ecc)) * half_tan)
+        hyp_anomaly = 2.0 * np.arctanh(np.sqrt((ecc - 1.0) / (ecc + 1.0)) * half_tan)
+    parabolic = np.abs(ecc - 1.0) < PARABOLIC_TOL
+    m0 = np.select(
+        [parabolic, ecc < 1.0],
+        [
+            half_tan + half_tan**3 / 3.0,
+            np.mod(ecc_anomaly - ecc * np.sin(ecc_anomaly), 2.0 * np.pi),
+        ],
+        default=ecc * np.sinh(hyp_anomaly) - hyp_anomaly,
+    )
+
+    return np.column_stack((rp, ecc, inc, lnode, argp, m0, et, mu))
+
+
+# Convert osculating elements (shape (N, 8)) into state vectors at the
+# epochs et (shape (N,) or scalar); the vectorised version of conics. The
+# state at periapsis is propagated to the requested epochs
+def elements_to_states(elements, et):
+    elements = np.atleast_2d(np.asarray(elements, dtype=np.float64))
+    rp, ecc, inc, lnode, argp, m0, t0, mu = elements.T
+
+    # Rotation matrix perifocal -> reference frame; only the first two
+    # columns (direction of the periapsis and of the velocity at periapsis)
+    # are needed
+    cos_o, sin_o = np.cos(lnode), np.sin(lnode)
+    cos_w, sin_w = np.cos(argp), np.sin(argp)
+    cos_i, sin_i = np.cos(inc), np.sin(inc)
+    p_hat = np.column_stack(
+        (
+            cos_o * cos_w - sin_o * sin_w * cos_i,
+            sin_o * cos_w + cos_o * sin_w * cos_i,
+            sin_w * sin_i,
+        )
+    )
+    q_hat = np.column_stack(
+        (
+            -cos_o * sin_w - sin_o * cos_w * cos_i,
+            -sin_o * sin_w + cos_o * cos_w * cos_i,
+            cos_w * sin_i,
+        )
+    )
+
+    v_peri = np.sqrt(mu * (1.0 + ecc) / rp)
+    periapsis_states = np.hstack(
+        (rp[:, np.newaxis] * p_hat, v_peri[:, np.newaxis] * q_hat)
+    )
+
+    # Time of periapsis passage
+    t_peri = t0 - m0 / mean_motion(rp, ecc, mu)
+
+    return propagate_states(periapsis_states, np.asarray(et) - t_peri, mu)
+
+
+# Propagate osculating elements (shape (N, 8)) to all epochs of et_array
+# (shape (T,)). Returns the states with the shape (T, N, 6)
+def propagate_elements(elements, et_array):
+    return np.array([elements_to_states(elements, et) for et in et_array])
+
+
+# First, the Earth example: compute the Earth's state w.r.t. the Sun for
+# today (midnight) and derive the osculating elements
+date_today = datetime.datetime.today().strftime("%Y-%m-%dT00:00:00")
+et_today_midnight = spiceypy.utc2et(date_today)
+
+earth_state_wrt_sun, _ = spiceypy.spkgeo(
+    targ=399, et=et_today_midnight, ref="ECLIPJ2000", obs=10
+)
+
+GM_SUN = body_gm(10)
+
+earth_elements = states_to_elements(earth_state_wrt_sun, et_today_midnight, GM_SUN)
+print(f"Osculating elements (numpy): {earth_elements[0]}")
+print(
+    f"Osculating elements (SPICE): "
+    + f"{spiceypy.oscelt(earth_state_wrt_sun, et_today_midnight, GM_SUN)}"
+)
+
+# Propagate the elements for one day and compare the result with the SPK
+# state
+et_tomorrow = et_today_midnight + 86400.0
+earth_state_kepler = elements_to_states(earth_elements, et_tomorrow)[0]
+earth_state_spk, _ = spiceypy.spkgeo(targ=399, et=et_tomorrow, ref="ECLIPJ2000", obs=10)
+print(
+    f"Position difference after one day (two-body vs. SPK) in km: "
+    + f"{np.linalg.norm(earth_state_kepler[:3] - earth_state_spk[:3])}"
+)
+
+# Now a synthetic population of one million bodies (elliptic and hyperbolic
+# orbits) around the Sun
+nr_of_bodies = 1_000_000
+rng = np.random.default_rng(seed=42)
+
+au_in_km = spiceypy.convrt(1.0, "AU", "km")
+population_elements = np.column_stack(
+    (
+        rng.uniform(0.5, 5.0, nr_of_bodies) * au_in_km,
+        rng.uniform(0.0, 1.5, nr_of_bodies),
+        rng.uniform(0.0, np.pi, nr_of_bodies),
+        rng.uniform(0.0, 2.0 * np.pi, nr_of_bodies),
+        rng.uniform(0.0, 2.0 * np.pi, nr_of_bodies),
+        rng.uniform(0.0, 2.0 * np.pi, nr_of_bodies),
+        np.full(nr_of_bodies, et_today_midnight),
+        np.full(nr_of_bodies, GM_SUN),
+    )
+)
+
+start_time = time.perf_counter()
+population_states = elements_to_states(
+    population_elements, et_today_midnight + 365.25 * 86400.0
+)
+duration = time.perf_counter() - start_time
+print(f"Propagated {nr_of_bodies} bodies in {duration:.2f} s")